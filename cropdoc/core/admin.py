@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import User, Crop, CropDisease, DiseaseTreatment
+from .models import (
+    User, UserStat, Crop, CropDisease, DiseaseAlias, DiseaseTreatment, DiagnosisEvent,
+)
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -7,6 +9,25 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('name', 'user_id')
     list_filter = ('role', 'country')
 
+@admin.register(UserStat)
+class UserStatAdmin(admin.ModelAdmin):
+    list_display = ('country', 'county', 'role', 'consent', 'total')
+    list_filter = ('role', 'country', 'consent')
+
 admin.site.register(Crop)
 admin.site.register(CropDisease)
+
+@admin.register(DiseaseAlias)
+class DiseaseAliasAdmin(admin.ModelAdmin):
+    list_display = ('alias', 'disease')
+    search_fields = ('alias', 'disease__disease_name')
+
 admin.site.register(DiseaseTreatment)
+
+@admin.register(DiagnosisEvent)
+class DiagnosisEventAdmin(admin.ModelAdmin):
+    list_display = ('disease_label', 'confidence', 'county', 'detected_at', 'user_id')
+    list_filter = ('county',)
+    search_fields = ('disease_label', 'event_id')
+    date_hierarchy = 'detected_at'
+    raw_id_fields = ('user',)
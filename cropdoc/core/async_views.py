@@ -0,0 +1,90 @@
+# core/async_views.py
+#
+# Async versions of the read endpoints, used instead of the DRF views in
+# core/views.py when settings.ASYNC_VIEWS is on (the ASGI entry point in
+# cropdoc/asgi.py turns it on). Under an ASGI server a slow client then
+# costs a coroutine rather than a worker thread.
+#
+# Responses are rendered with DRF's JSONRenderer, so bodies match the
+# sync views byte for byte; only JSON is offered (no browsable API).
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework.renderers import JSONRenderer
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .caching import async_catalog_cached
+from .catalog import aget_catalog
+from .images import get_image_manifest
+from .models import UserStat
+from .views import (
+    SAMPLE_IMAGES_FOLDER,
+    USER_STATS_COLUMNS,
+    _sample_images_etag,
+    _sample_images_last_modified,
+    _sample_images_payload,
+    get_treatments_for_disease,
+    summarize_user_stats,
+)
+
+
+def _json(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data), content_type="application/json", status=status
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Get Treatment by Disease
+# ─────────────────────────────────────────────────────────────────────────────
+@require_safe
+@async_catalog_cached
+async def get_treatment_by_disease(request):
+    """
+    Async `views.get_treatment_by_disease`: served from the catalog
+    snapshot, so no query runs once the snapshot is current.
+    """
+    catalog = await aget_catalog(request._catalog_version)
+    data, error = get_treatments_for_disease(
+        request.GET.get("id"), request.GET.get("name"), catalog=catalog
+    )
+    if error:
+        return _json(error, status=400)
+    return _json(data)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: User Statistics
+# ─────────────────────────────────────────────────────────────────────────────
+@require_safe
+async def user_stats(request):
+    rows = UserStat.objects.filter(total__gt=0).values_list(*USER_STATS_COLUMNS)
+    return _json(summarize_user_stats([row async for row in rows]))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Get Sample Images
+# ─────────────────────────────────────────────────────────────────────────────
+@condition(etag_func=_sample_images_etag, last_modified_func=_sample_images_last_modified)
+async def _sample_images(request):
+    response = _json(_sample_images_payload(request, request._sample_images_manifest))
+    if request._sample_images_manifest is not None:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_safe
+async def get_sample_images(request):
+    """
+    Async `views.get_sample_images`. The manifest (stat calls, hashing
+    on change) is loaded in a worker thread before the ETag check.
+    """
+    request._sample_images_manifest = await sync_to_async(get_image_manifest)(
+        SAMPLE_IMAGES_FOLDER
+    )
+    return await _sample_images(request)
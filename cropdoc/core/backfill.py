@@ -0,0 +1,157 @@
+# core/backfill.py
+#
+# Batched backfills for data migrations and online fixes.
+#
+# Nothing in this module imports concrete models at import time, so
+# migrations can use `run_backfill` with historical models from
+# `apps.get_model()`.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import time
+from dataclasses import dataclass
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.db import transaction
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# name -> function returning a BackfillJob, see `register_backfill`.
+BACKFILLS = {}
+
+
+@dataclass
+class BackfillProgress:
+    batches: int = 0
+    processed: int = 0
+    updated: int = 0
+    last_pk: object = None
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class BackfillJob:
+    """
+    What a registered backfill walks and how:
+    `transform(obj)` mutates one object and returns True if it changed;
+    `fields` are the columns written back; `after_batch(objs)` runs in the
+    batch transaction with the changed objects (e.g. to record changes).
+    """
+    queryset: object
+    transform: object
+    fields: list
+    after_batch: object = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Runner
+# ─────────────────────────────────────────────────────────────────────────────
+def run_backfill(
+    queryset,
+    transform,
+    fields,
+    batch_size=DEFAULT_BATCH_SIZE,
+    start_after=None,
+    checkpoint=None,
+    after_batch=None,
+    sleep=0.0,
+    progress=None,
+):
+    """
+    Walk `queryset` in primary-key order, `batch_size` rows at a time,
+    apply `transform` to each object and write changed objects back with
+    one `bulk_update` per batch.
+
+    Each batch is its own short transaction (a savepoint when called from
+    an atomic migration) that selects its rows `FOR UPDATE`, so writers
+    wait for the batch instead of being overwritten by it. Batches are
+    selected with `pk > last_pk`, so the walk can resume from
+    `start_after` and never loads the table into memory. `checkpoint(last_pk, progress)` is called after every
+    committed batch, `progress(progress)` for reporting, and `sleep`
+    seconds are waited between batches to throttle load on a live table.
+    """
+    state = BackfillProgress(last_pk=start_after)
+    started = time.monotonic()
+    # select_for_update() also makes `queryset.db` the write alias.
+    queryset = queryset.order_by("pk").select_for_update()
+
+    while True:
+        batch_qs = queryset
+        if state.last_pk is not None:
+            batch_qs = batch_qs.filter(pk__gt=state.last_pk)
+        with transaction.atomic(using=queryset.db):
+            # Locked until the batch commits: a row edited between reading
+            # and writing it back would otherwise lose that edit.
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                break
+
+            changed = [obj for obj in batch if transform(obj)]
+            if changed:
+                queryset.model._base_manager.using(queryset.db).bulk_update(changed, fields)
+                if after_batch is not None:
+                    after_batch(changed)
+            state.batches += 1
+            state.processed += len(batch)
+            state.updated += len(changed)
+            state.last_pk = batch[-1].pk
+            state.elapsed = time.monotonic() - started
+            if checkpoint is not None:
+                checkpoint(state.last_pk, state)
+
+        if progress is not None:
+            progress(state)
+        if len(batch) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    state.elapsed = time.monotonic() - started
+    return state
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────────────────────────────────────
+def register_backfill(name):
+    """
+    Register a function returning a BackfillJob so it can be run with
+    `manage.py backfill <name>`.
+    """
+    def decorator(func):
+        BACKFILLS[name] = func
+        return func
+    return decorator
+
+
+@register_backfill("normalize_disease_text")
+def normalize_disease_text():
+    """
+    Strip stray whitespace from CropDisease symptoms/prevention.
+    """
+    from .catalog import bump_catalog_version
+    from .models import CatalogChange, CropDisease
+    from .sync import record_changes
+
+    def transform(disease):
+        cleaned = [(getattr(disease, f) or "").strip() for f in ("symptoms", "prevention")]
+        if cleaned == [disease.symptoms, disease.prevention]:
+            return False
+        disease.symptoms, disease.prevention = cleaned
+        return True
+
+    def after_batch(diseases):
+        # bulk_update skips signals; keep sync and the catalog snapshot current.
+        record_changes(CropDisease, [d.pk for d in diseases], CatalogChange.UPSERT)
+        transaction.on_commit(bump_catalog_version)
+
+    return BackfillJob(
+        queryset=CropDisease.objects.only("disease_id", "symptoms", "prevention"),
+        transform=transform,
+        fields=["symptoms", "prevention"],
+        after_batch=after_batch,
+    )
@@ -0,0 +1,352 @@
+# core/bench.py
+#
+# Synthetic data and request driver for `manage.py bench`.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from itertools import count
+from urllib.parse import urlencode
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .catalog import bump_catalog_version
+from .images import get_image_manifest
+from .models import CatalogChange, Crop, CropDisease, DiagnosisEvent, DiseaseTreatment, User
+from .sync import get_sync_version, record_changes
+
+
+# Seeded rows are recognisable by these prefixes, so a re-seed only
+# replaces bench data.
+USER_PREFIX = "bench-user-"
+CROP_PREFIX = "Bench Crop "
+
+SEED_BATCH_SIZE = 5000
+
+COUNTIES = [
+    "Baringo", "Bomet", "Bungoma", "Busia", "Elgeyo-Marakwet", "Embu",
+    "Garissa", "Homa Bay", "Isiolo", "Kajiado", "Kakamega", "Kericho",
+    "Kiambu", "Kilifi", "Kirinyaga", "Kisii", "Kisumu", "Kitui", "Kwale",
+    "Laikipia", "Lamu", "Machakos", "Makueni", "Mandera", "Marsabit",
+    "Meru", "Migori", "Mombasa", "Murang'a", "Nairobi", "Nakuru", "Nandi",
+    "Narok", "Nyamira", "Nyandarua", "Nyeri", "Samburu", "Siaya",
+    "Taita-Taveta", "Tana River", "Tharaka-Nithi", "Trans-Nzoia", "Turkana",
+    "Uasin Gishu", "Vihiga", "Wajir", "West Pokot",
+]
+
+_NAME_WORDS = [
+    "common", "northern", "southern", "grey", "brown", "yellow", "black",
+    "leaf", "stem", "root", "ear", "streak", "spot", "blight", "rust",
+    "rot", "wilt", "mosaic", "smut", "mildew", "borer", "worm", "mite",
+]
+_SYMPTOM_WORDS = [
+    "lesions", "pustules", "rectangular", "oval", "elongated", "yellowing",
+    "wilting", "stunted", "chlorotic", "necrotic", "spots", "streaks",
+    "veins", "margins", "leaves", "stems", "cobs", "tassels", "holes",
+    "frass", "powdery", "grey", "brown", "reddish", "water-soaked",
+    "curling", "drying", "lodging", "mould", "galls", "larvae", "eggs",
+]
+
+
+@dataclass
+class SeedCounts:
+    users: int = 100_000
+    crops: int = 50
+    diseases: int = 5_000
+    treatments: int = 50_000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Seeding
+# ─────────────────────────────────────────────────────────────────────────────
+def is_bench_database(connection=connection):
+    """
+    True when `connection` points at a database that may be filled with
+    synthetic rows: the one named by settings.BENCH_DATABASE, or a test
+    database. DEBUG says nothing about which database is configured.
+    """
+    name = str(connection.settings_dict["NAME"])
+    if settings.BENCH_DATABASE and name == settings.BENCH_DATABASE:
+        return True
+    test_name = (connection.settings_dict.get("TEST") or {}).get("NAME")
+    if test_name and name == test_name:
+        return True
+    if connection.vendor == "sqlite" and connection.is_in_memory_db():
+        return True
+    return os.path.basename(name).startswith("test_")
+
+
+def clear_bench_data():
+    DiagnosisEvent.objects.filter(user__name__startswith=USER_PREFIX).delete()
+    User.objects.filter(name__startswith=USER_PREFIX).delete()
+    with transaction.atomic():
+        Crop.objects.filter(crop_name__startswith=CROP_PREFIX).delete()
+
+
+def _words(rng, vocabulary, low, high):
+    return " ".join(rng.choices(vocabulary, k=rng.randint(low, high)))
+
+
+def seed_users(n, rng):
+    for start in range(0, n, SEED_BATCH_SIZE):
+        batch = []
+        for i in range(start, min(start + SEED_BATCH_SIZE, n)):
+            in_kenya = rng.random() < 0.9
+            batch.append(User(
+                name=f"{USER_PREFIX}{i}",
+                country="Kenya" if in_kenya else "Other",
+                county=rng.choice(COUNTIES) if in_kenya else None,
+                role=rng.choices(
+                    ["farmer", "extension_officer", "researcher"], weights=[85, 12, 3]
+                )[0],
+                consent=rng.random() < 0.8,
+            ))
+        User.objects.bulk_create(batch)
+
+
+def seed_catalog(counts, rng):
+    """
+    Bulk-insert crops, diseases and treatments. Bulk writes skip signals,
+    so the change log and catalog version are updated here.
+    """
+    with transaction.atomic():
+        crops = Crop.objects.bulk_create([
+            Crop(crop_name=f"{CROP_PREFIX}{i:03}", description="Synthetic benchmark crop")
+            for i in range(counts.crops)
+        ])
+        record_changes(Crop, [c.pk for c in crops], CatalogChange.UPSERT)
+
+        diseases = []
+        for i in range(counts.diseases):
+            diseases.append(CropDisease(
+                crop=crops[i % len(crops)],
+                disease_name=f"{_words(rng, _NAME_WORDS, 2, 3).title()} {i}",
+                symptoms=_words(rng, _SYMPTOM_WORDS, 15, 40),
+                prevention=_words(rng, _SYMPTOM_WORDS, 5, 15),
+            ))
+        diseases = CropDisease.objects.bulk_create(diseases, batch_size=SEED_BATCH_SIZE)
+        record_changes(CropDisease, [d.pk for d in diseases], CatalogChange.UPSERT)
+
+        treatments = []
+        for i in range(counts.treatments):
+            disease = diseases[i % len(diseases)]
+            treatments.append(DiseaseTreatment(
+                disease=disease,
+                crop_id=disease.crop_id,
+                drug_name=f"Benchmycin {i}",
+                drug_administration_instructions=_words(rng, _SYMPTOM_WORDS, 10, 30),
+            ))
+        treatments = DiseaseTreatment.objects.bulk_create(treatments, batch_size=SEED_BATCH_SIZE)
+        record_changes(DiseaseTreatment, [t.pk for t in treatments], CatalogChange.UPSERT)
+
+        transaction.on_commit(bump_catalog_version)
+
+
+def seed(counts, seed=0):
+    rng = random.Random(seed)
+    clear_bench_data()
+    if counts.crops:
+        seed_catalog(counts, rng)
+    seed_users(counts.users, rng)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cases
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass
+class Case:
+    name: str
+    path: str
+    method: str = "get"
+    data: object = None           # dict, or a callable returning one per request
+    headers: dict = None
+    max_iterations: int = None    # cap for expensive endpoints
+
+
+def build_cases():
+    """
+    One or more requests per endpoint in core/urls.py, using ids from the
+    current database.
+    """
+    crop = Crop.objects.order_by("pk").first()
+    disease = CropDisease.objects.order_by("pk").first()
+    treatment = DiseaseTreatment.objects.order_by("pk").first()
+    user = User.objects.order_by("pk").first()
+    disease_ids = list(CropDisease.objects.order_by("pk").values_list("pk", flat=True)[:20])
+    names = list(CropDisease.objects.order_by("pk").values_list("disease_name", flat=True)[:20])
+    county = (
+        User.objects.exclude(county=None).order_by("pk").values_list("county", flat=True).first()
+        or "Nakuru"
+    )
+
+    serial = count()
+
+    def bulk_rows():
+        batch = next(serial)
+        return [
+            {
+                "name": f"{USER_PREFIX}bulk-{time.time_ns()}-{batch}-{i}",
+                "country": "Kenya",
+                "county": county,
+                "role": "farmer",
+                "consent": True,
+            }
+            for i in range(100)
+        ]
+
+    def diagnosis_events():
+        return [
+            {
+                "event_id": str(uuid.uuid4()),
+                "user": str(user.pk) if user else None,
+                "disease_label": names[i % len(names)] if names else "Common Rust",
+                "confidence": 0.9,
+                "county": county,
+            }
+            for i in range(100)
+        ]
+
+    cases = [
+        Case("api-root", "/api/"),
+        Case("users-list", "/api/users/?page_size=100"),
+        Case("users-list-500", "/api/users/?page_size=500"),
+        Case("users-bulk", "/api/users/bulk/", method="post", data=bulk_rows, max_iterations=20),
+        Case("users-export", "/api/users/export/?" + urlencode({"county": county}), max_iterations=10),
+        Case("crops-list", "/api/crops/"),
+        Case("diseases-list", "/api/diseases/"),
+        Case("diseases-list-500", "/api/diseases/?page_size=500"),
+        Case("treatments-list", "/api/treatments/"),
+        Case("treatments-list-500", "/api/treatments/?page_size=500"),
+        Case("get-treatments-get", "/api/get-treatments/?ids=" + ",".join(map(str, disease_ids))),
+        Case("get-treatments-post", "/api/get-treatments/", method="post", data={"names": names}),
+        Case("search-symptoms", "/api/search-symptoms/?q=rectangular+grey+lesions+between+veins"),
+        Case("catalog-bundle", "/api/catalog/bundle/", headers={"Accept-Encoding": "gzip"}),
+        Case("catalog-delta", f"/api/catalog/delta/?since={max(get_sync_version() - 100, 0)}"),
+        Case("user-stats", "/api/user-stats/"),
+        Case("diagnosis-events", "/api/diagnosis-events/", method="post", data=diagnosis_events),
+        Case("sample-images", "/api/sample-images/"),
+    ]
+    if user is not None:
+        cases.append(Case("users-detail", f"/api/users/{user.pk}/"))
+    if crop is not None:
+        cases += [
+            Case("crops-detail", f"/api/crops/{crop.pk}/"),
+            Case("crops-full", f"/api/crops/{crop.pk}/full/"),
+            Case("crops-full-sparse", f"/api/crops/{crop.pk}/full/?" + urlencode({
+                "fields": "crop_name,diseases.disease_id,diseases.disease_name,diseases.treatments.drug_name",
+            })),
+        ]
+    if disease is not None:
+        cases += [
+            Case("diseases-detail", f"/api/diseases/{disease.pk}/"),
+            Case("get-treatment-id", f"/api/get-treatment/?id={disease.pk}"),
+            Case("get-treatment-name", "/api/get-treatment/?" + urlencode({"name": disease.disease_name})),
+            Case("resolve-disease-exact", "/api/resolve-disease/?" + urlencode({"name": disease.disease_name})),
+            Case("resolve-disease-fuzzy", "/api/resolve-disease/?" + urlencode({"name": disease.disease_name[:-1] + "x"})),
+        ]
+    if treatment is not None:
+        cases.append(Case("treatments-detail", f"/api/treatments/{treatment.pk}/"))
+
+    manifest = get_image_manifest(os.path.join(settings.MEDIA_ROOT, "sample_images"))
+    if manifest is not None and manifest.images:
+        cases.append(Case("media-file", f"{settings.MEDIA_URL}sample_images/{manifest.images[0]['name']}"))
+    return cases
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Runner
+# ─────────────────────────────────────────────────────────────────────────────
+def _send(client, case):
+    """
+    Issue one request and read the whole body, including streamed ones.
+    Returns (status, body size).
+    """
+    data = case.data() if callable(case.data) else case.data
+    kwargs = {"headers": case.headers or {}}
+    if case.method == "post":
+        response = client.post(case.path, json.dumps(data), content_type="application/json", **kwargs)
+    else:
+        response = client.get(case.path, data, **kwargs)
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def _percentiles(timings):
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98]}
+
+
+def run_case(client, case, iterations=30, warmup=3):
+    """
+    Measure one case: query count from a captured request, peak Python
+    memory from a traced request, and latency from `iterations` plain
+    requests (neither capture nor tracing skews the timings).
+    """
+    iterations = max(min(iterations, case.max_iterations or iterations), 2)
+    for _ in range(warmup):
+        _send(client, case)
+
+    # request_started resets the query log (with DEBUG on); start empty so
+    # the capture is not cut short.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        status, size = _send(client, case)
+
+    tracemalloc.start()
+    try:
+        _send(client, case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _send(client, case)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "name": case.name,
+        "method": case.method.upper(),
+        "path": case.path,
+        "status": status,
+        "bytes": size,
+        "iterations": iterations,
+        **{key: round(value, 3) for key, value in _percentiles(timings).items()},
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": len(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(cases, iterations=30, warmup=3, only=None):
+    client = Client()
+    results = []
+    for case in cases:
+        if only and not any(pattern in case.name for pattern in only):
+            continue
+        results.append(run_case(client, case, iterations, warmup))
+    return results
+
+
+def dataset_counts():
+    return {
+        "users": User.objects.count(),
+        "crops": Crop.objects.count(),
+        "diseases": CropDisease.objects.count(),
+        "treatments": DiseaseTreatment.objects.count(),
+    }
@@ -0,0 +1,126 @@
+# core/caching.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import hashlib
+from functools import wraps
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework.permissions import AllowAny
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .catalog import aget_catalog_version, get_catalog_version
+from .compression import precompressed
+from .db_router import use_primary
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Validators
+# ─────────────────────────────────────────────────────────────────────────────
+def catalog_etag(request, *args, **kwargs):
+    """
+    ETag for any representation derived from the catalog. It changes with
+    the catalog version, the absolute URL (query string, cursors, host) and
+    the requested media type. Only the cache is read; no ORM access.
+    Async views read the version beforehand (see `async_catalog_cached`).
+    """
+    version = getattr(request, "_catalog_version", None)
+    if version is None:
+        version = request._catalog_version = get_catalog_version()
+    token = "|".join((
+        str(version),
+        request.build_absolute_uri(),
+        request.headers.get("Accept", ""),
+    ))
+    return hashlib.blake2b(token.encode(), digest_size=12).hexdigest()
+
+
+catalog_condition = condition(etag_func=catalog_etag)
+
+
+def patch_catalog_cache_headers(request, response, encoded=False):
+    if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+        patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+        patch_vary_headers(response, ("Accept", "Accept-Encoding") if encoded else ("Accept",))
+        if response.has_header("Content-Encoding") and response.get("ETag", "").startswith('"'):
+            # One ETag covers every encoding of the representation, so it
+            # is only weakly equal to each of them (as with GZipMiddleware).
+            response["ETag"] = "W/" + response["ETag"]
+    return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Decorator / Mixin
+# ─────────────────────────────────────────────────────────────────────────────
+def catalog_cached(view_func):
+    """
+    Wrap a catalog view with ETag/If-None-Match handling. A matching
+    request gets a 304 before the view (and so the ORM or serializers)
+    runs. Place it above `@api_view`.
+
+    The view reads from the primary: the ETag comes from the version
+    bumped there, and a replica behind it would put stale rows under the
+    new ETag, which clients then keep revalidating with 304s.
+    """
+    conditional_view = catalog_condition(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with use_primary():
+            response = conditional_view(request, *args, **kwargs)
+        return patch_catalog_cache_headers(request, response)
+
+    return wrapper
+
+
+def async_catalog_cached(view_func):
+    """
+    `catalog_cached` for async views. The version is read from the cache
+    off the event loop first and kept on the request for the ETag (and
+    for `aget_catalog(request._catalog_version)` in the view).
+    """
+    conditional_view = catalog_condition(view_func)
+
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        request._catalog_version = await aget_catalog_version()
+        with use_primary():
+            response = await conditional_view(request, *args, **kwargs)
+        return patch_catalog_cache_headers(request, response)
+
+    return wrapper
+
+
+class CatalogCacheMixin:
+    """
+    `catalog_cached` for viewsets: list and retrieve answer 304 from the
+    catalog version alone, and read from the primary. With `precompress`,
+    GET responses are also served from pre-compressed bytes (see
+    core.compression), keyed on the `precompress_params` query parameters.
+
+    A pre-compressed hit is answered before DRF authenticates, checks
+    permissions or throttles, so it is only used while every permission
+    class is `AllowAny` and no throttles are set.
+    """
+    precompress = False
+    precompress_params = ("cursor", "page_size", "format")
+
+    def uses_precompression(self):
+        return (
+            self.precompress
+            and not self.throttle_classes
+            and all(issubclass(p, AllowAny) for p in self.permission_classes)
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        view = super().dispatch
+        encoded = self.uses_precompression()
+        if encoded:
+            view = precompressed(view, self.precompress_params)
+        with use_primary():
+            response = catalog_condition(view)(request, *args, **kwargs)
+        return patch_catalog_cache_headers(request, response, encoded=encoded)
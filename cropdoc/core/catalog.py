@@ -0,0 +1,201 @@
+# core/catalog.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .db_router import use_primary
+from .models import Crop, CropDisease, DiseaseAlias, DiseaseTreatment
+from .resolver import DiseaseNameIndex, NameMatch
+from .search import SymptomIndex
+from .serializers import (
+    CropSerializer,
+    CropDiseaseSerializer,
+    DiseaseTreatmentSerializer,
+)
+
+
+CATALOG_CACHE_ALIAS = "catalog"
+CATALOG_VERSION_KEY = "core:catalog-version"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Version
+# ─────────────────────────────────────────────────────────────────────────────
+def get_catalog_version():
+    """
+    Return the current catalog version token.
+
+    The token lives in the "catalog" cache (see core/checks.py) so every
+    worker sees the same value. If the key is missing (cold or flushed cache) a
+    fresh token is stored, which forces every process to rebuild.
+    """
+    return caches[CATALOG_CACHE_ALIAS].get_or_set(CATALOG_VERSION_KEY, time.time_ns, timeout=None)
+
+
+async def aget_catalog_version():
+    return await caches[CATALOG_CACHE_ALIAS].aget_or_set(CATALOG_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_catalog_version():
+    """
+    Move the catalog version so that every process drops its snapshot.
+
+    A new time-based token is written instead of incrementing, so two
+    concurrent bumps can never collapse into the same value.
+    """
+    cache = caches[CATALOG_CACHE_ALIAS]
+    version = max(time.time_ns(), (cache.get(CATALOG_VERSION_KEY) or 0) + 1)
+    cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    return version
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Snapshot
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable, pre-serialized view of the Crop/CropDisease/DiseaseTreatment
+    catalog. Treat the contained dicts as read-only.
+    """
+    version: int
+    crops: tuple
+    diseases: tuple
+    diseases_by_id: MappingProxyType
+    diseases_by_name: MappingProxyType
+    treatments_by_disease: MappingProxyType
+    name_index: DiseaseNameIndex
+    symptom_index: SymptomIndex
+
+    def find_crop_id(self, crop):
+        """
+        Accept a crop id or a case-insensitive crop name. Returns None on miss.
+        """
+        crop = str(crop).strip()
+        if crop.isdigit():
+            crop_id = int(crop)
+            return crop_id if any(c["crop_id"] == crop_id for c in self.crops) else None
+        for c in self.crops:
+            if c["crop_name"].lower() == crop.lower():
+                return c["crop_id"]
+        return None
+
+    def resolve_disease(self, disease_name):
+        """
+        Resolve a free-text disease label (exact, alias or fuzzy match).
+        Returns a `NameMatch` or None.
+        """
+        disease = self.diseases_by_name.get(disease_name.strip().lower())
+        if disease is not None:
+            return NameMatch(
+                disease_id=disease["disease_id"],
+                disease_name=disease["disease_name"],
+                matched=disease["disease_name"],
+                score=1.0,
+                method="exact",
+            )
+        return self.name_index.resolve(disease_name)
+
+    def find_disease_id(self, disease_name, fuzzy=False):
+        """
+        Id of the disease named exactly (case and spacing aside) or by an
+        alias. Fuzzy matches are only accepted with `fuzzy`, since a close
+        name can be a different disease ("Southern" vs "Northern Leaf
+        Blight"). Returns None on miss.
+        """
+        match = self.resolve_disease(disease_name)
+        if match is None or (match.method == "fuzzy" and not fuzzy):
+            return None
+        return match.disease_id
+
+    def treatments_for(self, disease_id):
+        return list(self.treatments_by_disease.get(disease_id, ()))
+
+
+def build_snapshot(version):
+    """
+    Load the whole catalog with four queries, serialize it once and build
+    the lookup and search indexes over it.
+    """
+    crops = tuple(CropSerializer(Crop.objects.order_by("crop_id"), many=True).data)
+    diseases = tuple(
+        CropDiseaseSerializer(
+            CropDisease.objects.order_by("disease_id"), many=True
+        ).data
+    )
+
+    treatments = {}
+    for row in DiseaseTreatmentSerializer(
+        DiseaseTreatmentSerializer.setup_eager_loading(
+            DiseaseTreatment.objects.order_by("drug_id")
+        ),
+        many=True,
+    ).data:
+        treatments.setdefault(row["disease"], []).append(row)
+
+    by_name = {}
+    for disease in diseases:
+        # First (lowest id) disease wins when two share a name.
+        by_name.setdefault(disease["disease_name"].strip().lower(), disease)
+
+    return CatalogSnapshot(
+        version=version,
+        crops=crops,
+        diseases=diseases,
+        diseases_by_id=MappingProxyType({d["disease_id"]: d for d in diseases}),
+        diseases_by_name=MappingProxyType(by_name),
+        treatments_by_disease=MappingProxyType(
+            {disease_id: tuple(rows) for disease_id, rows in treatments.items()}
+        ),
+        name_index=DiseaseNameIndex(
+            ((d["disease_id"], d["disease_name"]) for d in diseases),
+            DiseaseAlias.objects.values_list("alias", "disease_id"),
+        ),
+        symptom_index=SymptomIndex(diseases),
+    )
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog():
+    """
+    Return the in-process catalog snapshot, rebuilding it lazily when the
+    shared catalog version has moved since it was built.
+    """
+    global _snapshot
+
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            # The snapshot is kept until the version moves again, so it
+            # must not come from a replica that is behind the bump.
+            with use_primary():
+                _snapshot = build_snapshot(version)
+        return _snapshot
+
+
+async def aget_catalog(version=None):
+    """
+    `get_catalog` for async views. A current snapshot is returned without
+    leaving the event loop; a rebuild runs in a worker thread.
+    """
+    if version is None:
+        version = await aget_catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    return await sync_to_async(get_catalog)()
@@ -0,0 +1,48 @@
+# core/checks.py
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+# Backends whose values only one process sees.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+# Backends whose values only one host sees.
+HOST_LOCAL_CACHES = ("django.core.cache.backends.filebased.FileBasedCache",)
+
+
+@register(Tags.caches, deploy=True)
+def check_catalog_cache(app_configs=None, **kwargs):
+    """
+    A worker that cannot see the catalog version bumped by another keeps
+    serving its old snapshot (and ETags) until it restarts, so the
+    "catalog" cache must be shared by every process serving the API.
+    """
+    backend = settings.CACHES.get("catalog", {}).get("BACKEND")
+    if backend is None:
+        return [Error(
+            'CACHES has no "catalog" alias for the catalog version token.',
+            hint="Set CATALOG_CACHE_BACKEND and CATALOG_CACHE_LOCATION.",
+            id="core.E001",
+        )]
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"The catalog cache ({backend}) is not shared between workers.",
+            hint="Use Redis, memcached or the database cache.",
+            id="core.E002",
+        )]
+    if backend in HOST_LOCAL_CACHES and not settings.CATALOG_CACHE_SINGLE_HOST:
+        # The default: right for one host, so a warning rather than a
+        # failure that would keep the stock deploy from booting.
+        return [Warning(
+            f"The catalog cache ({backend}) is not shared between hosts.",
+            hint=(
+                "Use Redis, memcached or the database cache if more than one "
+                "host serves the API, or set CATALOG_CACHE_SINGLE_HOST=1."
+            ),
+            id="core.W001",
+        )]
+    return []
@@ -0,0 +1,215 @@
+# core/compression.py
+#
+# Pre-compressed catalog responses. A JSON response is rendered once per
+# catalog version (and URL path, the query parameters the view reads and
+# Accept header), compressed once with each available encoding, and later
+# requests get the bytes for their Accept-Encoding straight from memory:
+# no view, serializer, renderer or compressor runs. brotli and zstandard
+# are optional; gzip is always on.
+#
+# A hit also skips DRF's authentication, permission and throttle checks,
+# so only views open to anyone may be wrapped (see CatalogCacheMixin).
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import gzip
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.http import HttpResponse, QueryDict
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .catalog import get_catalog_version
+from .db_router import use_primary
+from .profiling import render_timed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Smaller bodies are sent as they are; compression would not pay off.
+MIN_COMPRESS_SIZE = 1024
+
+# Encoding -> compressor, in server preference order. A miss compresses
+# while its client waits, and after a catalog write every page misses at
+# once; the densest levels (brotli 11, zstd 19) cost tens to hundreds of
+# times more CPU for a few percent, so moderate ones are used.
+COMPRESSORS = {}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda data: zstandard.ZstdCompressor(level=6).compress(data)
+COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+# Headers of the rendered response kept with the variants.
+_KEPT_HEADERS = ("Content-Type", "Allow", "Vary")
+
+
+@dataclass(frozen=True)
+class CompressedResponse:
+    identity: bytes
+    variants: dict        # encoding -> bytes, only where smaller
+    headers: tuple
+
+    @property
+    def size(self):
+        return len(self.identity) + sum(len(v) for v in self.variants.values())
+
+
+def compress_variants(data):
+    if len(data) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {}
+    for encoding, compress in COMPRESSORS.items():
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def choose_encoding(accept_encoding, available):
+    """
+    Pick the preferred available encoding the client accepts (q > 0),
+    or None for identity.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for encoding in COMPRESSORS:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# In-Memory Store
+# ─────────────────────────────────────────────────────────────────────────────
+_entries = OrderedDict()   # (version, scheme, host, path, params, accept) -> CompressedResponse
+_entries_bytes = 0
+_entries_version = None
+_entries_lock = threading.Lock()
+
+
+def max_bytes():
+    return getattr(settings, "PRECOMPRESS_MAX_BYTES", 32 * 1024 * 1024)
+
+
+def _lookup(key):
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def _store(key, entry):
+    """
+    Keep `entry`, evicting least recently used ones until the store fits
+    in PRECOMPRESS_MAX_BYTES. An entry larger than that is not kept.
+    """
+    global _entries_bytes, _entries_version
+
+    limit = max_bytes()
+    if entry.size > limit:
+        return
+    with _entries_lock:
+        if key[0] != _entries_version:
+            # Older versions can never be served again.
+            _entries.clear()
+            _entries_bytes = 0
+            _entries_version = key[0]
+        previous = _entries.pop(key, None)
+        if previous is not None:
+            _entries_bytes -= previous.size
+        _entries[key] = entry
+        _entries_bytes += entry.size
+        while _entries_bytes > limit:
+            _, evicted = _entries.popitem(last=False)
+            _entries_bytes -= evicted.size
+
+
+def _response(entry, encoding):
+    response = HttpResponse(entry.variants[encoding] if encoding else entry.identity)
+    for name, value in entry.headers:
+        response[name] = value
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# View Wrapper
+# ─────────────────────────────────────────────────────────────────────────────
+def precompressed(view_func, params=()):
+    """
+    Serve GET responses of a catalog view from pre-compressed variants.
+
+    Entries are keyed on the query parameters in `params` only, so unread
+    or reordered parameters do not fill the store with copies. On a miss
+    the view runs with just those parameters (so pagination links are the
+    same for every request sharing the entry), reads from the primary
+    (the result is kept for the whole version) and is rendered; a 200
+    JSON response is stored with its compressed variants. Other responses
+    pass through untouched.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "GET" or not max_bytes():
+            return view_func(request, *args, **kwargs)
+
+        query = QueryDict(mutable=True)
+        for name in sorted(params):
+            if name in request.GET:
+                query.setlist(name, request.GET.getlist(name))
+        version = getattr(request, "_catalog_version", None) or get_catalog_version()
+        key = (
+            version,
+            request.scheme,
+            request.get_host(),
+            request.path,
+            query.urlencode(),
+            request.headers.get("Accept", ""),
+        )
+        accept_encoding = request.headers.get("Accept-Encoding", "")
+
+        entry = _lookup(key)
+        if entry is None:
+            request.GET = query
+            request.META["QUERY_STRING"] = key[4]
+            with use_primary():
+                response = view_func(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                render_timed(request, response)
+            if response.status_code != 200 or response.streaming or not response.get(
+                "Content-Type", ""
+            ).startswith("application/json"):
+                return response
+            entry = CompressedResponse(
+                identity=response.content,
+                variants=compress_variants(response.content),
+                headers=tuple((h, response[h]) for h in _KEPT_HEADERS if response.has_header(h)),
+            )
+            _store(key, entry)
+
+        return _response(entry, choose_encoding(accept_encoding, entry.variants))
+
+    return wrapper
@@ -0,0 +1,200 @@
+# core/db_router.py
+#
+# Primary/replica routing. Replicas are the DATABASES aliases listed in
+# settings.DATABASE_REPLICAS (see DATABASE_REPLICA_URLS in settings).
+#
+# Only safe requests (GET/HEAD/OPTIONS) passing through
+# ReplicaRoutingMiddleware read from a replica, one per request. Reads go
+# to the primary when:
+#   - the request is unsafe, or wrote anything (db_for_write was asked);
+#   - the client wrote within REPLICA_STICKY_SECONDS (a cookie set after
+#     the write), so it reads its own writes despite replication lag;
+#   - a transaction is open on the primary;
+#   - no replica is healthy: one that fails to connect is skipped for
+#     REPLICA_RETRY_SECONDS;
+#   - code runs outside a request (commands, shell) or in `use_primary()`,
+#     which every view behind a catalog ETag uses (see core.caching).
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import asyncio
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+STICKY_COOKIE = "cropdoc_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@dataclass
+class _Routing:
+    replica: str = None   # alias chosen for this request, once needed
+    primary: bool = False
+    wrote: bool = False
+
+
+_routing = contextvars.ContextVar("db_routing", default=None)
+
+# Replica alias -> time.monotonic() until which it is skipped.
+_unhealthy = {}
+
+
+def _replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _usable(alias):
+    """
+    Whether a replica can be used, connecting to it if needed (a no-op for
+    an open connection). In async code connecting is left to the query
+    itself, which runs on a worker thread.
+    """
+    if _unhealthy.get(alias, 0) > time.monotonic():
+        return False
+    if _in_event_loop():
+        return True
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        connections[alias].close()
+        _unhealthy[alias] = time.monotonic() + getattr(settings, "REPLICA_RETRY_SECONDS", 30)
+        return False
+    _unhealthy.pop(alias, None)
+    return True
+
+
+def _choose_replica():
+    candidates = list(_replicas())
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _usable(alias):
+            return alias
+    return None
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside this block, e.g. when building caches
+    keyed by a version that was bumped on the primary.
+    """
+    state = _routing.get()
+    token = _routing.set(_Routing(primary=True, wrote=state.wrote if state else False))
+    try:
+        yield
+    finally:
+        if state is not None and _routing.get().wrote:
+            state.wrote = True
+        _routing.reset(token)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Router
+# ─────────────────────────────────────────────────────────────────────────────
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.primary or not _replicas():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None or not _usable(state.replica):
+            state.replica = _choose_replica()
+            if state.replica is None:
+                state.primary = True
+                return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            # Later reads in this request, and this client's next few
+            # requests, must see the write.
+            state.wrote = True
+            state.primary = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in _replicas():
+            return False
+        return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────────────────────
+class ReplicaRoutingMiddleware:
+    """
+    Sets up routing for each request and, after a write, a cookie keeping
+    the client on the primary for REPLICA_STICKY_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _routing.set(self.start(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            state = _routing.get()
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        token = _routing.set(self.start(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = _routing.get()
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        primary = request.method not in SAFE_METHODS or pinned_until > time.time()
+        return _Routing(primary=primary)
+
+    def finish(self, response, state):
+        if state.wrote and _replicas():
+            sticky = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{time.time() + sticky:.3f}",
+                max_age=sticky,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
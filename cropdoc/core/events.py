@@ -0,0 +1,207 @@
+# core/events.py
+#
+# Write-behind buffer for diagnosis events. Requests only append to an
+# in-process queue; a flusher thread writes it with `bulk_create` once
+# EVENTS_BATCH_SIZE events are waiting or the oldest has waited
+# EVENTS_FLUSH_MS, so ingestion costs one INSERT per batch, not one
+# transaction per event.
+#
+# Delivery is at-least-once: a batch that fails because the database is
+# unreachable is put back in front of the queue and retried, and the
+# queue is flushed when the process exits (atexit, and gunicorn's
+# worker_exit hook). Rows are inserted ignoring conflicts on the
+# client-generated `event_id`, so a retried batch or a re-sent event is
+# stored once. A chunk the database rejects for its data is retried row
+# by row and the rows still rejected are dropped and logged, so one bad
+# event cannot block the queue. A process killed outright loses what was
+# queued since the last flush.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, connections, router
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .metrics import inc
+from .models import DiagnosisEvent
+
+
+logger = logging.getLogger(__name__)
+
+# The database (or the connection to it) failed, not the rows: retry later.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+class EventBuffer:
+    """
+    Queue of unsaved model instances written in batches by a daemon
+    thread, started on first use in each process.
+    """
+
+    def __init__(self, model, batch_size=500, flush_interval=1.0, max_pending=50_000):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._reset()
+        # Threads do not survive fork, and a forked worker must not write
+        # the events its parent had queued.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = deque()
+        self._oldest = None       # time.monotonic() of the oldest queued event
+        self._retry_at = 0        # no flush before this after a failure
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, objs):
+        """
+        Queue instances for writing. Returns False, queuing nothing, when
+        that would exceed `max_pending`; the client should retry later.
+        """
+        with self._cond:
+            if len(self._pending) + len(objs) > self.max_pending:
+                return False
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="event-buffer-flusher", daemon=True
+                )
+                self._thread.start()
+            was_empty = not self._pending
+            if was_empty:
+                self._oldest = time.monotonic()
+            self._pending.extend(objs)
+            # The flusher sleeps without a timeout while the queue is empty.
+            if was_empty or len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _wait_time(self):
+        """
+        Seconds until a flush is due: 0 when due now, None while empty.
+        """
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        if now < self._retry_at:
+            return self._retry_at - now
+        if len(self._pending) >= self.batch_size:
+            return 0
+        return max(self._oldest + self.flush_interval - now, 0)
+
+    def _run(self):
+        cond = self._cond
+        while True:
+            with cond:
+                wait = self._wait_time()
+                while wait != 0:
+                    cond.wait(wait)
+                    wait = self._wait_time()
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything queued now, `batch_size` rows per INSERT. If the
+        database is unavailable the unwritten rest goes back in front of
+        the queue and is retried after `flush_interval`; rows it rejects
+        are dropped (see the module notes). Returns the number of rows
+        sent.
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending)
+                self._pending.clear()
+                self._oldest = None
+            if not batch:
+                return 0
+
+            written = dropped = done = 0
+            alias = router.db_for_write(self.model)
+            objects = self.model.objects.using(alias)
+            try:
+                # This thread never sees request_finished; drop connections
+                # past CONN_MAX_AGE or broken by an earlier failure here.
+                close_old_connections()
+                while done < len(batch):
+                    chunk = batch[done:done + self.batch_size]
+                    try:
+                        objects.bulk_create(chunk, ignore_conflicts=True)
+                        written += len(chunk)
+                        done += len(chunk)
+                        continue
+                    except TRANSIENT_ERRORS:
+                        raise
+                    except Exception:
+                        # One bad row fails its whole chunk.
+                        pass
+                    for obj in chunk:
+                        try:
+                            objects.bulk_create([obj], ignore_conflicts=True)
+                            written += 1
+                        except TRANSIENT_ERRORS:
+                            raise
+                        except Exception:
+                            logger.exception("Dropping %s %s rejected by the database", self.model.__name__, obj.pk)
+                            dropped += 1
+                        done += 1
+            except Exception:
+                rest = batch[done:]
+                logger.exception("Writing %d %s rows failed; requeued", len(rest), self.model.__name__)
+                inc("cropdoc_events_flush_failures_total", {})
+                connections[alias].close()
+                with self._cond:
+                    self._pending.extendleft(reversed(rest))
+                    self._oldest = self._retry_at = time.monotonic() + self.flush_interval
+            if written:
+                inc("cropdoc_events_written_total", {}, written)
+            if dropped:
+                inc("cropdoc_events_dropped_total", {}, dropped)
+            return written
+
+    def close(self):
+        """
+        Final flush before exit; reports anything that could not be written.
+        """
+        self.flush()
+        if self._pending:
+            logger.error("Exiting with %d unwritten %s rows", len(self._pending), self.model.__name__)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_event_buffer():
+    global _buffer
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = EventBuffer(
+                    DiagnosisEvent,
+                    batch_size=getattr(settings, "EVENTS_BATCH_SIZE", 500),
+                    flush_interval=getattr(settings, "EVENTS_FLUSH_MS", 1000) / 1000,
+                    max_pending=getattr(settings, "EVENTS_MAX_PENDING", 50_000),
+                )
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def flush_events():
+    """
+    Flush queued diagnosis events now, e.g. from gunicorn's worker_exit.
+    """
+    if _buffer is not None:
+        _buffer.close()
@@ -0,0 +1,97 @@
+# core/exports.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import csv
+import json
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .models import User
+
+
+USER_EXPORT_FIELDS = ("user_id", "name", "country", "county", "role", "consent")
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+_TRUE_VALUES = {"1", "true", "yes", "y"}
+_FALSE_VALUES = {"0", "false", "no", "n"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Filtering
+# ─────────────────────────────────────────────────────────────────────────────
+def parse_consent(value):
+    """
+    Parse a consent filter value. Returns None when no filter is requested
+    and raises ValueError for anything that is not a boolean.
+    """
+    if value in (None, ""):
+        return None
+    value = str(value).strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid consent value: {value!r}")
+
+
+def filter_users(country=None, county=None, role=None, consent=None):
+    """
+    Build the export queryset. Blank filters are ignored; county matches
+    case-insensitively since it is free text.
+    """
+    queryset = User.objects.order_by()
+    if country:
+        queryset = queryset.filter(country=country)
+    if county:
+        queryset = queryset.filter(county__iexact=county)
+    if role:
+        queryset = queryset.filter(role=role)
+    if consent is not None:
+        queryset = queryset.filter(consent=consent)
+    return queryset
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming Encoders
+# ─────────────────────────────────────────────────────────────────────────────
+class _Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can
+    be used as a line encoder for streaming.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_user_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield user tuples in chunks. On PostgreSQL `.iterator()` runs over a
+    server-side cursor, so only one chunk is held in memory at a time.
+    """
+    return queryset.values_list(*USER_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def iter_ndjson(rows):
+    for user_id, *values in rows:
+        record = dict(zip(USER_EXPORT_FIELDS, (str(user_id), *values)))
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(USER_EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_users(queryset, export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Return an iterator of encoded lines for the requested format.
+    """
+    rows = iter_user_rows(queryset, chunk_size=chunk_size)
+    if export_format == "csv":
+        return iter_csv(rows)
+    return iter_ndjson(rows)
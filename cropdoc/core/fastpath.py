@@ -0,0 +1,146 @@
+# core/fastpath.py
+#
+# Serializer-free list responses and a faster JSON renderer, both behind
+# settings.API_FAST_PATH (on by default; `manage.py bench --no-fast-path`
+# measures the DRF path for comparison).
+#
+# `ValuesListMixin.list` reads rows with `values_list()` and hands plain
+# dicts to the renderer, skipping model instances and per-field
+# `to_representation`. The keys, their order and the pagination envelope
+# are taken from the viewset's serializer and paginator, so the output is
+# the same as the serializer's.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+from functools import lru_cache
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def fast_path_enabled():
+    return getattr(settings, "API_FAST_PATH", True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Renderer
+# ─────────────────────────────────────────────────────────────────────────────
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` writing compact output with orjson. Dates, times and
+    anything orjson does not know go through DRF's encoder, so the bytes
+    match. Indented output, ASCII-only settings, a missing orjson or data
+    orjson rejects fall back to `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not fast_path_enabled()
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these two, which are valid JSON but not
+        # valid JavaScript.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Values Path
+# ─────────────────────────────────────────────────────────────────────────────
+# Fields whose representation is the column value itself (DRF only applies
+# str()/int()/bool() to values that already have that type).
+_PLAIN_FIELDS = (
+    serializers.ReadOnlyField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+
+@lru_cache(maxsize=None)
+def values_spec(serializer_class):
+    """
+    [(key, lookup)] in serializer field order, e.g. ("disease",
+    "disease_id") or ("symptoms", "disease__symptoms"). None when any
+    readable field needs the serializer (method fields, nested
+    serializers, formatting), so the caller falls back to it.
+    """
+    model = serializer_class.Meta.model
+    spec = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        source = field.source
+        if source == "*":
+            return None
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None or "." in source:
+                return None
+            lookup = model._meta.get_field(source).attname
+        elif isinstance(field, serializers.UUIDField):
+            if field.uuid_format != "hex_verbose":
+                return None
+            lookup = source.replace(".", "__")
+        elif isinstance(field, serializers.ChoiceField) and not isinstance(
+            field, serializers.MultipleChoiceField
+        ):
+            lookup = source.replace(".", "__")
+        elif type(field) in _PLAIN_FIELDS:
+            lookup = source.replace(".", "__")
+        else:
+            return None
+        spec.append((name, lookup))
+
+    lookups = [lookup for _, lookup in spec]
+    if len(set(lookups)) != len(lookups):
+        return None
+    return tuple(spec)
+
+
+class ValuesListMixin:
+    """
+    Fast path for `list` on read-only JSON requests; see the module notes.
+    """
+
+    def list(self, request, *args, **kwargs):
+        spec = values_spec(self.get_serializer_class())
+        if spec is None or not fast_path_enabled() or request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        keys = [key for key, _ in spec]
+        lookups = [lookup for _, lookup in spec]
+        pk = queryset.model._meta.pk.attname
+        if pk not in lookups:
+            # Cursor positions are read from the rows; zip() drops it below.
+            lookups.append(pk)
+        rows = queryset.values_list(*lookups, named=True)
+
+        page = self.paginate_queryset(rows)
+        data = [dict(zip(keys, row)) for row in (rows if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,166 @@
+# core/images.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import hashlib
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Image Dimensions
+# ─────────────────────────────────────────────────────────────────────────────
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        if kind == 0xFF:  # fill byte
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if kind in (0xD8, 0x01) or 0xD0 <= kind <= 0xD7:  # markers without length
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC).
+        if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _png_size(f):
+    f.seek(16)
+    return struct.unpack(">II", f.read(8))
+
+
+def _webp_size(f):
+    f.seek(12)
+    chunk = f.read(4)
+    if chunk == b"VP8 ":
+        f.seek(26)
+        width, height = struct.unpack("<HH", f.read(4))
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        f.seek(21)
+        b = f.read(4)
+        width = 1 + (((b[1] & 0x3F) << 8) | b[0])
+        height = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        return width, height
+    if chunk == b"VP8X":
+        f.seek(24)
+        b = f.read(6)
+        return (
+            1 + int.from_bytes(b[0:3], "little"),
+            1 + int.from_bytes(b[3:6], "little"),
+        )
+    return None
+
+
+def image_dimensions(path):
+    """
+    Read (width, height) from the file header of a JPEG, PNG or WebP image
+    without decoding it. Returns None for unknown or truncated files.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(16)
+            if head.startswith(b"\xff\xd8"):
+                return _jpeg_size(f)
+            if head.startswith(b"\x89PNG\r\n\x1a\n"):
+                return _png_size(f)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_size(f)
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+
+def file_sha256(path, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sample Image Manifest
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class ImageManifest:
+    signature: tuple
+    images: tuple
+    etag: str
+    last_modified: datetime
+
+
+def _folder_signature(folder):
+    """
+    Cheap change detector for the folder: adding, removing or renaming an
+    image changes the directory's mtime; replacing the folder changes its
+    inode.
+    """
+    st = os.stat(folder)
+    return (st.st_dev, st.st_ino, st.st_mtime_ns)
+
+
+def build_manifest(folder, signature):
+    images = []
+    latest = os.stat(folder).st_mtime
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(folder, file_name)
+        st = os.stat(path)
+        latest = max(latest, st.st_mtime)
+        width, height = image_dimensions(path) or (None, None)
+        images.append({
+            "name": file_name,
+            "size": st.st_size,
+            "width": width,
+            "height": height,
+            "sha256": file_sha256(path),
+        })
+
+    etag = hashlib.sha256(
+        "\n".join(f"{i['name']}:{i['sha256']}" for i in images).encode()
+    ).hexdigest()[:32]
+
+    return ImageManifest(
+        signature=signature,
+        images=tuple(images),
+        etag=etag,
+        last_modified=datetime.fromtimestamp(int(latest), tz=timezone.utc),
+    )
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_image_manifest(folder):
+    """
+    Return the cached manifest for `folder`, rebuilding it only when the
+    folder signature changes. Returns None if the folder does not exist.
+    """
+    try:
+        signature = _folder_signature(folder)
+    except FileNotFoundError:
+        return None
+
+    manifest = _manifests.get(folder)
+    if manifest is not None and manifest.signature == signature:
+        return manifest
+
+    with _manifests_lock:
+        manifest = _manifests.get(folder)
+        if manifest is None or manifest.signature != signature:
+            manifest = _manifests[folder] = build_manifest(folder, signature)
+        return manifest
@@ -0,0 +1,225 @@
+# core/importer.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import csv
+from dataclasses import dataclass, field
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.db import transaction
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .catalog import bump_catalog_version
+from .models import CatalogChange, Crop, CropDisease, DiseaseTreatment
+from .oncommit import on_commit_once
+from .sync import record_changes
+
+
+BATCH_SIZE = 1000
+
+# Map from CSV disease names to the standardized class names the mobile
+# classifier emits.
+DISEASE_NAME_MAP = {
+    'Fall armyworm (pest)': 'Fall Army Worm',
+    'Common Rust (Fungal)': 'Common Rust',
+    'Northern Leaf Blight (Fungal)': 'Northern Leaf Blight',
+    'Gray Leaf Spot (Fungal)': 'Grey Leaf Spot',
+    'Northern Leaf Spot (Fungal)': 'Northern Leaf Spot',
+    'Healthy': 'Healthy',
+}
+
+
+@dataclass
+class CatalogRow:
+    crop_name: str
+    disease_name: str
+    symptoms: str
+    prevention: str
+    drug_name: str
+    instructions: str
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    skipped: list = field(default_factory=list)
+    crops_created: int = 0
+    diseases_created: int = 0
+    diseases_updated: int = 0
+    diseases_deleted: int = 0
+    treatments_created: int = 0
+    treatments_updated: int = 0
+    treatments_deleted: int = 0
+
+    @property
+    def changed(self):
+        return any((
+            self.crops_created,
+            self.diseases_created, self.diseases_updated, self.diseases_deleted,
+            self.treatments_created, self.treatments_updated, self.treatments_deleted,
+        ))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CSV Reading
+# ─────────────────────────────────────────────────────────────────────────────
+def read_catalog_csv(f, default_crop="Maize", strict=True, stats=None):
+    """
+    Stream CatalogRows from a CSV with `Disease`, `Symptoms`, `Prevention`
+    and `Treatment` columns, plus optional `Crop` and `Drug` columns.
+
+    Names found in DISEASE_NAME_MAP are standardized. Any other name is
+    skipped (and listed in `stats.skipped`) unless `strict` is off, in
+    which case it is imported as written.
+    """
+    for row in csv.DictReader(f):
+        if stats is not None:
+            stats.rows += 1
+        raw_name = (row.get("Disease") or "").strip()
+        if not raw_name:
+            continue
+        disease_name = DISEASE_NAME_MAP.get(raw_name)
+        if disease_name is None:
+            if strict:
+                if stats is not None:
+                    stats.skipped.append(raw_name)
+                continue
+            disease_name = raw_name
+
+        treatment = (row.get("Treatment") or "").strip()
+        yield CatalogRow(
+            crop_name=(row.get("Crop") or "").strip() or default_crop,
+            disease_name=disease_name,
+            symptoms=(row.get("Symptoms") or "").strip(),
+            prevention=(row.get("Prevention") or "").strip(),
+            drug_name=(
+                (row.get("Drug") or "").strip()
+                or (f"Recommended Treatment for {disease_name}" if treatment else "")
+            ),
+            instructions=treatment,
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Import
+# ─────────────────────────────────────────────────────────────────────────────
+def import_catalog(rows, prune=True, dry_run=False, stats=None):
+    """
+    Upsert CatalogRows by natural key in one transaction:
+    crops by name, diseases by (crop, disease_name) and treatments by
+    (disease, drug_name). Existing rows are diffed in memory and only
+    changed ones are written, with `bulk_create`/`bulk_update`.
+
+    With `prune`, diseases and treatments of the imported crops that are
+    not in the file are deleted. With `dry_run` everything is rolled back
+    and only the stats are returned.
+    """
+    stats = stats or ImportStats()
+
+    # Desired state, last row wins for a repeated key.
+    diseases, treatments = {}, {}
+    for row in rows:
+        key = (row.crop_name, row.disease_name)
+        diseases[key] = (row.symptoms, row.prevention)
+        if row.drug_name:
+            treatments[key + (row.drug_name,)] = row.instructions
+
+    with transaction.atomic():
+        crop_ids = _upsert_crops({crop for crop, _ in diseases}, stats)
+        disease_ids = _upsert_diseases(diseases, crop_ids, prune, stats)
+        _upsert_treatments(treatments, crop_ids, disease_ids, prune, stats)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif stats.changed:
+            # bulk_create/bulk_update send no signals; share the bump the
+            # delete signals may already have queued.
+            on_commit_once(bump_catalog_version)
+
+    return stats
+
+
+def _upsert_crops(names, stats):
+    crop_ids = dict(Crop.objects.filter(crop_name__in=names).values_list("crop_name", "crop_id"))
+    new = [Crop(crop_name=name) for name in sorted(names - crop_ids.keys())]
+    if new:
+        Crop.objects.bulk_create(new)
+        record_changes(Crop, [c.pk for c in new], CatalogChange.UPSERT)
+        crop_ids.update((c.crop_name, c.pk) for c in new)
+        stats.crops_created = len(new)
+    return crop_ids
+
+
+def _upsert_diseases(desired, crop_ids, prune, stats):
+    existing = {
+        (d.crop_id, d.disease_name): d
+        for d in CropDisease.objects.filter(crop_id__in=crop_ids.values())
+        .only("disease_id", "crop_id", "disease_name", "symptoms", "prevention")
+        .order_by("disease_id")
+    }
+
+    new, changed, wanted = [], [], set()
+    for (crop_name, disease_name), (symptoms, prevention) in desired.items():
+        key = (crop_ids[crop_name], disease_name)
+        wanted.add(key)
+        disease = existing.get(key)
+        if disease is None:
+            new.append(CropDisease(
+                crop_id=key[0], disease_name=disease_name,
+                symptoms=symptoms, prevention=prevention,
+            ))
+        elif (disease.symptoms or "", disease.prevention or "") != (symptoms, prevention):
+            disease.symptoms, disease.prevention = symptoms, prevention
+            changed.append(disease)
+
+    CropDisease.objects.bulk_create(new, batch_size=BATCH_SIZE)
+    CropDisease.objects.bulk_update(changed, ["symptoms", "prevention"], batch_size=BATCH_SIZE)
+    record_changes(CropDisease, [d.pk for d in new + changed], CatalogChange.UPSERT)
+    stats.diseases_created, stats.diseases_updated = len(new), len(changed)
+
+    if prune:
+        stale = [d.pk for key, d in existing.items() if key not in wanted]
+        # Queryset delete sends post_delete, which records tombstones.
+        stats.diseases_deleted = CropDisease.objects.filter(pk__in=stale).delete()[1].get(
+            CropDisease._meta.label, 0
+        )
+
+    disease_ids = {key: d.pk for key, d in existing.items() if key in wanted}
+    disease_ids.update(((d.crop_id, d.disease_name), d.pk) for d in new)
+    return disease_ids
+
+
+def _upsert_treatments(desired, crop_ids, disease_ids, prune, stats):
+    existing = {
+        (t.disease_id, t.drug_name): t
+        for t in DiseaseTreatment.objects.filter(disease_id__in=disease_ids.values())
+        .only("drug_id", "disease_id", "crop_id", "drug_name", "drug_administration_instructions")
+        .order_by("drug_id")
+    }
+
+    new, changed, wanted = [], [], set()
+    for (crop_name, disease_name, drug_name), instructions in desired.items():
+        crop_id = crop_ids[crop_name]
+        key = (disease_ids[(crop_id, disease_name)], drug_name)
+        wanted.add(key)
+        treatment = existing.get(key)
+        if treatment is None:
+            new.append(DiseaseTreatment(
+                disease_id=key[0], crop_id=crop_id, drug_name=drug_name,
+                drug_administration_instructions=instructions,
+            ))
+        elif treatment.drug_administration_instructions != instructions:
+            treatment.drug_administration_instructions = instructions
+            changed.append(treatment)
+
+    DiseaseTreatment.objects.bulk_create(new, batch_size=BATCH_SIZE)
+    DiseaseTreatment.objects.bulk_update(
+        changed, ["drug_administration_instructions"], batch_size=BATCH_SIZE
+    )
+    record_changes(DiseaseTreatment, [t.pk for t in new + changed], CatalogChange.UPSERT)
+    stats.treatments_created, stats.treatments_updated = len(new), len(changed)
+
+    if prune:
+        stale = [t.pk for key, t in existing.items() if key not in wanted]
+        stats.treatments_deleted = DiseaseTreatment.objects.filter(pk__in=stale).delete()[1].get(
+            DiseaseTreatment._meta.label, 0
+        )
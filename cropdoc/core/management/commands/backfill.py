@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.backfill import BACKFILLS, DEFAULT_BATCH_SIZE, run_backfill
+from core.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Runs a registered batched backfill, resuming from its last checkpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Backfill to run (see --list).')
+        parser.add_argument('--list', action='store_true', help='List registered backfills and their progress.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per batch.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to wait between batches.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the beginning.')
+
+    def handle(self, *args, **options):
+        if options['list'] or not options['name']:
+            checkpoints = {c.name: c for c in BackfillCheckpoint.objects.all()}
+            for name in sorted(BACKFILLS):
+                checkpoint = checkpoints.get(name)
+                if checkpoint is None:
+                    state = 'not started'
+                elif checkpoint.completed_at:
+                    state = f'completed {checkpoint.completed_at:%Y-%m-%d %H:%M}, {checkpoint.updated} updated'
+                else:
+                    state = f'{checkpoint.processed} rows done, next after pk {checkpoint.last_pk}'
+                self.stdout.write(f"{name}: {state}")
+            return
+
+        name = options['name']
+        if name not in BACKFILLS:
+            raise CommandError(f"Unknown backfill '{name}'. Use --list to see the registered ones.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        job = BACKFILLS[name]()
+        checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=name)
+        if options['restart']:
+            checkpoint.last_pk, checkpoint.processed, checkpoint.updated = None, 0, 0
+            checkpoint.completed_at = None
+        elif checkpoint.completed_at:
+            self.stdout.write(self.style.SUCCESS(f"✅ {name} already completed; use --restart to run it again."))
+            return
+
+        start_after = None
+        if checkpoint.last_pk is not None:
+            start_after = job.queryset.model._meta.pk.to_python(checkpoint.last_pk)
+            self.stdout.write(f"↪️ Resuming {name} after pk {checkpoint.last_pk}")
+        processed, updated = checkpoint.processed, checkpoint.updated
+
+        def save_checkpoint(last_pk, progress):
+            # Runs inside the batch transaction, so it commits with the batch.
+            checkpoint.last_pk = str(last_pk)
+            checkpoint.processed = processed + progress.processed
+            checkpoint.updated = updated + progress.updated
+            checkpoint.save()
+
+        def report(progress):
+            self.stdout.write(
+                f"  batch {progress.batches}: {progress.processed} rows, "
+                f"{progress.updated} updated, {progress.rate:.0f} rows/s"
+            )
+
+        result = run_backfill(
+            job.queryset,
+            job.transform,
+            job.fields,
+            batch_size=options['batch_size'],
+            start_after=start_after,
+            checkpoint=save_checkpoint,
+            after_batch=job.after_batch,
+            sleep=options['sleep'],
+            progress=report if options['verbosity'] >= 1 else None,
+        )
+
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {name}: {result.processed} rows in {result.batches} batches, "
+            f"{result.updated} updated ({result.elapsed:.1f}s)."
+        ))
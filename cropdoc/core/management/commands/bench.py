@@ -0,0 +1,118 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds synthetic data and benchmarks every API endpoint through the test client, '
+        'printing JSON with latency percentiles, queries per request and peak memory.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = bench.SeedCounts()
+        parser.add_argument('--users', type=int, default=defaults.users, help='Synthetic users to seed.')
+        parser.add_argument('--crops', type=int, default=defaults.crops, help='Synthetic crops to seed.')
+        parser.add_argument('--diseases', type=int, default=defaults.diseases, help='Synthetic diseases to seed.')
+        parser.add_argument('--treatments', type=int, default=defaults.treatments, help='Synthetic treatments to seed.')
+        parser.add_argument('--no-seed', action='store_true', help='Benchmark the data already in the database.')
+        parser.add_argument('--clear', action='store_true', help='Only remove previously seeded bench data.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data.')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint first.')
+        parser.add_argument('--only', action='append', help='Only run cases whose name contains this (repeatable).')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Run against a database that is neither BENCH_DATABASE nor a test database.',
+        )
+        parser.add_argument(
+            '--no-fast-path', action='store_true',
+            help='Serve lists through the serializers and JSONRenderer (API_FAST_PATH off).',
+        )
+        parser.add_argument(
+            '--no-precompress', action='store_true',
+            help='Render catalog lists on every request instead of serving stored bytes.',
+        )
+
+    def handle(self, *args, **options):
+        # Seeding, clearing and the POST cases all write to the database.
+        if not bench.is_bench_database(connection) and not options['force']:
+            raise CommandError(
+                f"Refusing to write bench data to {connection.settings_dict['NAME']}: "
+                "set BENCH_DATABASE to its name if it only holds benchmark data, or pass --force."
+            )
+        if options['clear']:
+            bench.clear_bench_data()
+            self.stderr.write(self.style.SUCCESS("✅ Removed bench data."))
+            return
+
+        if not options['no_seed']:
+            counts = bench.SeedCounts(
+                users=options['users'],
+                crops=options['crops'],
+                diseases=options['diseases'],
+                treatments=options['treatments'],
+            )
+            if counts.crops < 1 and (counts.diseases or counts.treatments):
+                raise CommandError("--crops must be at least 1 to seed diseases and treatments.")
+            if counts.diseases < 1 and counts.treatments:
+                raise CommandError("--diseases must be at least 1 to seed treatments.")
+            started = time.monotonic()
+            bench.seed(counts, seed=options['seed'])
+            self.stderr.write(f"🌱 Seeded bench data in {time.monotonic() - started:.1f}s")
+
+        overrides = {}
+        if options['no_fast_path']:
+            overrides['API_FAST_PATH'] = False
+        if options['no_precompress']:
+            overrides['PRECOMPRESS_MAX_BYTES'] = 0
+        with override_settings(**overrides):
+            results = bench.run(
+                bench.build_cases(),
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=options['only'],
+            )
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'fast_path': not options['no_fast_path'] and settings.API_FAST_PATH,
+                'precompress': not options['no_precompress'] and bool(settings.PRECOMPRESS_MAX_BYTES),
+                'dataset': bench.dataset_counts(),
+            },
+            'endpoints': results,
+        }
+
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+            self.stderr.write(self.style.SUCCESS(f"✅ Wrote {len(results)} results to {options['output']}"))
+        else:
+            self.stdout.write(text)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
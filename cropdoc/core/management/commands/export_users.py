@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    filter_users,
+    parse_consent,
+    stream_users,
+)
+
+
+class Command(BaseCommand):
+    help = 'Streams the User table as NDJSON or CSV with constant memory use.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+        parser.add_argument('--country')
+        parser.add_argument('--county')
+        parser.add_argument('--role')
+        parser.add_argument('--consent', help='true/false')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            consent = parse_consent(options['consent'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = filter_users(
+            country=options['country'],
+            county=options['county'],
+            role=options['role'],
+            consent=consent,
+        )
+        lines = stream_users(queryset, options['format'], chunk_size=options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"✅ Exported users to {options['output']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
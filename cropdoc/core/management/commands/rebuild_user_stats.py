@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.models import UserStat
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the UserStat rollup from the User table, fixing any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; do not write. Exits with status 1 if any is found.',
+        )
+
+    def handle(self, *args, **options):
+        drift = UserStat.objects.reconcile(dry_run=options['check'])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("✅ UserStat rollup is in sync."))
+            return
+
+        for (country, county, role, consent), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"⚠️ {country}/{county or '-'}/{role}/consent={consent}: "
+                    f"stored {stored}, actual {actual}"
+                )
+            )
+
+        if options['check']:
+            self.stderr.write(self.style.ERROR(f"❌ {len(drift)} rollup rows out of sync."))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(f"✅ Fixed {len(drift)} rollup rows."))
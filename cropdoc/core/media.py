@@ -0,0 +1,186 @@
+# core/media.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+SERVE_MODE_DJANGO = "django"
+SERVE_MODE_ACCEL = "x-accel-redirect"
+SERVE_MODE_SENDFILE = "x-sendfile"
+
+RANGE_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+def _file_etag(st):
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range against a file of `size` bytes.
+    Returns (start, end) inclusive, None if the header should be ignored
+    (absent, malformed or multi-range) and raises ValueError if the range
+    cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    """
+    A Range is only honoured if If-Range (when sent) still matches the file.
+    """
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_file_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, full_path):
+    """
+    Build an empty response that tells the front proxy to send the file.
+    The proxy then handles Range and keep-alive itself.
+    """
+    response = HttpResponse()
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == SERVE_MODE_ACCEL:
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+    else:
+        response["X-Sendfile"] = full_path
+    # Let the proxy fill in the real type and length.
+    del response["Content-Type"]
+    return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# View: Serve Media
+# ─────────────────────────────────────────────────────────────────────────────
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with ETag/Last-Modified revalidation,
+    long-lived Cache-Control and single byte-range support.
+
+    With MEDIA_SERVE_MODE set to "x-accel-redirect" (nginx) or
+    "x-sendfile" (Apache/lighttpd), only headers are produced here and the
+    proxy streams the bytes, so no worker is tied up by a download.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found")
+    try:
+        st = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Media file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    etag = _file_etag(st)
+    last_modified = int(st.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        if settings.MEDIA_SERVE_MODE in (SERVE_MODE_ACCEL, SERVE_MODE_SENDFILE):
+            response = _offload(path, full_path)
+        else:
+            response = _serve_file(request, full_path, st, etag, last_modified)
+    if response.status_code == 416:
+        return response
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _serve_file(request, full_path, st, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    byte_range = None
+    if _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), st.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{st.st_size}"
+            return response
+
+    if byte_range is None:
+        # FileResponse lets the WSGI server use sendfile() when it can.
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file_range(full_path, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
+
+
+def media_urlpatterns():
+    """
+    URL patterns serving MEDIA_URL through `serve_media`. Like
+    `django.conf.urls.static.static`, nothing is mounted when MEDIA_URL
+    points at another host, but unlike it this also works with DEBUG off.
+    """
+    prefix = settings.MEDIA_URL
+    if not prefix or "://" in prefix:
+        return []
+    return [
+        re_path(r"^%s(?P<path>.*)$" % re.escape(prefix.lstrip("/")), serve_media),
+    ]
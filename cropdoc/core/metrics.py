@@ -0,0 +1,424 @@
+# core/metrics.py
+#
+# Per-view request metrics in Prometheus text format.
+#
+# With settings.METRICS_DIR set, each process appends its samples to its
+# own memory-mapped file in that directory (metrics_<pid>.db) and the
+# /api/metrics endpoint sums every file, so all gunicorn workers are
+# reported no matter which one serves the scrape. Files of exited
+# workers are kept, since every sample is a counter; the directory
+# should be emptied on (re)deploy, see `clear_metrics_dir`. Without
+# METRICS_DIR samples are kept in memory for the current process only.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import bisect
+import contextvars
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "cropdoc_http_requests_total": (
+        "counter", "Requests by view, method and status code.", None,
+    ),
+    "cropdoc_http_request_duration_seconds": (
+        "histogram", "Time until the view returned a response.", LATENCY_BUCKETS,
+    ),
+    "cropdoc_http_response_size_bytes": (
+        "histogram", "Response body size, when known up front.", SIZE_BUCKETS,
+    ),
+    "cropdoc_db_queries_per_request": (
+        "histogram", "Database queries issued per request.", QUERY_BUCKETS,
+    ),
+    "cropdoc_db_queries_total": (
+        "counter", "Database queries issued.", None,
+    ),
+    "cropdoc_db_query_duration_seconds_total": (
+        "counter", "Time spent in database queries.", None,
+    ),
+    "cropdoc_events_written_total": (
+        "counter", "Diagnosis events sent to the database by the write-behind buffer.", None,
+    ),
+    "cropdoc_events_flush_failures_total": (
+        "counter", "Failed buffer flushes; their events were requeued.", None,
+    ),
+    "cropdoc_events_dropped_total": (
+        "counter", "Diagnosis events the database rejected; dropped and logged.", None,
+    ),
+    "cropdoc_events_rejected_total": (
+        "counter", "Diagnosis events refused because the buffer was full.", None,
+    ),
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Storage
+# ─────────────────────────────────────────────────────────────────────────────
+# Sample key: JSON of [sample name, sorted label pairs].
+def _sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(",", ":"))
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] += amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+
+# File layout: a 4-byte "used bytes" header padded to 8, then entries of
+# a 4-byte key length, the UTF-8 key padded to 8-byte alignment and an
+# 8-byte double. An entry is written before the header moves past it, so
+# readers never see a partial entry.
+_HEADER = 8
+_INITIAL_SIZE = 1 << 16
+
+
+def _read_entries(data, used):
+    pos = _HEADER
+    while pos < used:
+        (length,) = struct.unpack_from("<i", data, pos)
+        pos += 4
+        key = bytes(data[pos:pos + length]).decode("utf-8")
+        pos += length + (8 - (4 + length) % 8) % 8
+        (value,) = struct.unpack_from("<d", data, pos)
+        yield key, value, pos
+        pos += 8
+
+
+class _MmapStore:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map()
+        (self._used,) = struct.unpack_from("<i", self._mmap, 0)
+        if self._used == 0:
+            self._used = _HEADER
+            struct.pack_into("<i", self._mmap, 0, self._used)
+        self._positions = {key: pos for key, _, pos in _read_entries(self._mmap, self._used)}
+
+    def _map(self):
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def _add_key(self, key):
+        encoded = key.encode("utf-8")
+        padding = (8 - (4 + len(encoded)) % 8) % 8
+        entry = struct.pack("<i", len(encoded)) + encoded + b" " * padding + struct.pack("<d", 0.0)
+        while self._used + len(entry) > self._capacity:
+            self._mmap.close()
+            self._file.truncate(self._capacity * 2)
+            self._map()
+        self._mmap[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into("<i", self._mmap, 0, self._used)
+        position = self._used - 8
+        self._positions[key] = position
+        return position
+
+    def inc(self, key, amount):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            (value,) = struct.unpack_from("<d", self._mmap, position)
+            struct.pack_into("<d", self._mmap, position, value + amount)
+
+
+def _collect_dir(directory):
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(directory, "metrics_*.db")):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        if len(data) < _HEADER:
+            continue
+        (used,) = struct.unpack_from("<i", data, 0)
+        for key, value, _ in _read_entries(data, min(used, len(data))):
+            totals[key] += value
+    return totals
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    """
+    The current process's store. Re-created after a fork, so workers
+    forked from a preloaded master never write to the master's file.
+    """
+    global _store, _store_pid
+
+    pid = os.getpid()
+    if _store_pid == pid:
+        return _store
+    with _store_lock:
+        if _store_pid != pid:
+            directory = getattr(settings, "METRICS_DIR", None)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                _store = _MmapStore(os.path.join(directory, f"metrics_{pid}.db"))
+            else:
+                _store = _MemoryStore()
+            _store_pid = pid
+    return _store
+
+
+def clear_metrics_dir(directory=None):
+    """
+    Remove all per-process files, e.g. from gunicorn's on_starting hook.
+    """
+    directory = directory or getattr(settings, "METRICS_DIR", None)
+    if directory:
+        for path in glob.glob(os.path.join(directory, "metrics_*.db")):
+            os.remove(path)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Recording
+# ─────────────────────────────────────────────────────────────────────────────
+def inc(name, labels, amount=1.0):
+    _get_store().inc(_sample_key(name, labels), amount)
+
+
+def observe(name, labels, value):
+    """
+    Record a histogram observation. Only the bucket hit is stored; the
+    exposition makes the buckets cumulative.
+    """
+    buckets = METRICS[name][2]
+    index = bisect.bisect_left(buckets, value)
+    le = str(float(buckets[index])) if index < len(buckets) else "+Inf"
+    store = _get_store()
+    store.inc(_sample_key(name + "_bucket", {**labels, "le": le}), 1.0)
+    store.inc(_sample_key(name + "_sum", labels), value)
+    store.inc(_sample_key(name + "_count", labels), 1.0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Query Observation
+# ─────────────────────────────────────────────────────────────────────────────
+# Callbacks for queries run in the current context. A context variable
+# rather than per-request execute_wrappers, because the async ORM runs
+# queries on another thread's connection; sync_to_async copies the
+# context there, so the callbacks follow the request.
+_query_observers = contextvars.ContextVar("query_observers", default=())
+
+
+def _observe_query(execute, sql, params, many, context):
+    observers = _query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for observer in observers:
+            observer(sql, params, many, context, elapsed)
+
+
+def _install_query_hook(connection, **kwargs):
+    if _observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_observe_query)
+
+
+connection_created.connect(_install_query_hook, dispatch_uid="core.metrics.query_hook")
+
+
+@contextmanager
+def observe_queries(observer):
+    """
+    Call `observer(sql, params, many, context, seconds)` for every query
+    run in this context, including sync_to_async threads it spawns.
+    """
+    # Connections opened before this module was imported have no hook yet.
+    for connection in connections.all(initialized_only=True):
+        _install_query_hook(connection)
+    token = _query_observers.set(_query_observers.get() + (observer,))
+    try:
+        yield
+    finally:
+        _query_observers.reset(token)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, sql, params, many, context, seconds):
+        self.count += 1
+        self.duration += seconds
+
+
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "<unresolved>"
+
+
+def _response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+class MetricsMiddleware:
+    """
+    Record latency, response size, status code and database queries per
+    resolved view. Keep it first in MIDDLEWARE so the timings cover the
+    rest of the stack. For streaming responses the latency ends when the
+    view returns, before the body is sent. Works under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with observe_queries(timer):
+            response = self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with observe_queries(timer):
+            response = await self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, timer, duration):
+        view = _view_label(request)
+        labels = {"view": view, "method": request.method}
+        inc("cropdoc_http_requests_total", {**labels, "status": str(response.status_code)})
+        observe("cropdoc_http_request_duration_seconds", labels, duration)
+        size = _response_size(response)
+        if size is not None:
+            observe("cropdoc_http_response_size_bytes", {"view": view}, size)
+        observe("cropdoc_db_queries_per_request", {"view": view}, timer.count)
+        if timer.count:
+            inc("cropdoc_db_queries_total", {"view": view}, timer.count)
+            inc("cropdoc_db_query_duration_seconds_total", {"view": view}, timer.duration)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Exposition
+# ─────────────────────────────────────────────────────────────────────────────
+def collect():
+    directory = getattr(settings, "METRICS_DIR", None)
+    if directory:
+        return _collect_dir(directory)
+    return _get_store().collect()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+        return f"{name}{{{rendered}}} {value!r}"
+    return f"{name} {value!r}"
+
+
+def render(samples):
+    """
+    Render {sample key: value} in the Prometheus text format, with
+    cumulative histogram buckets.
+    """
+    by_name = defaultdict(list)
+    for key, value in samples.items():
+        name, labels = json.loads(key)
+        by_name[name].append((tuple(map(tuple, labels)), value))
+
+    lines = []
+    for family, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        if kind == "counter":
+            for labels, value in sorted(by_name.get(family, [])):
+                lines.append(_format_sample(family, labels, value))
+            continue
+
+        hits = defaultdict(dict)  # labels without le -> {le: count}
+        for labels, value in by_name.get(family + "_bucket", []):
+            le = dict(labels)["le"]
+            hits[tuple(l for l in labels if l[0] != "le")][le] = value
+        sums = dict(by_name.get(family + "_sum", []))
+        counts = dict(by_name.get(family + "_count", []))
+        for labels in sorted(counts):
+            cumulative = 0.0
+            for bound in [str(float(b)) for b in buckets] + ["+Inf"]:
+                cumulative += hits[labels].get(bound, 0.0)
+                lines.append(_format_sample(family + "_bucket", labels + (("le", bound),), cumulative))
+            lines.append(_format_sample(family + "_sum", labels, sums.get(labels, 0.0)))
+            lines.append(_format_sample(family + "_count", labels, counts[labels]))
+    return "\n".join(lines) + "\n"
+
+
+def _scrape_allowed(request):
+    """
+    Scrapes authenticate with "Authorization: Bearer <METRICS_TOKEN>"
+    (Prometheus' `authorization` scrape option). Without a token nothing
+    is allowed: the view names, query counts and latencies are not public.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    scheme, _, value = request.headers.get("Authorization", "").partition(" ")
+    if not token or scheme.lower() != "bearer" or not value:
+        return False
+    return constant_time_compare(value.strip(), token)
+
+
+@require_GET
+def metrics_view(request):
+    if not _scrape_allowed(request):
+        raise Http404
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
@@ -1,31 +1,49 @@
 from django.db import migrations
 
+BATCH_SIZE = 1000
+
+
+def split_text(disease):
+    text = disease.disease_characteristics or ""
+
+    # Initialize empty values
+    symptoms = ""
+    prevention = ""
+
+    # Parse data if formatted like your example
+    if "**Symptoms:**" in text:
+        symptoms = text.split("**Symptoms:**")[1].split("**Prevention:**")[0].strip()
+
+    if "**Prevention:**" in text:
+        prevention = text.split("**Prevention:**")[1].strip()
+
+    if (disease.symptoms, disease.prevention) == (symptoms, prevention):
+        return False
+    disease.symptoms = symptoms
+    disease.prevention = prevention
+    return True
+
 def split_characteristics(apps, schema_editor):
     CropDisease = apps.get_model('core', 'CropDisease')
-
-    for disease in CropDisease.objects.all():
-        text = disease.disease_characteristics or ""
-
-        # Initialize empty values
-        symptoms = ""
-        prevention = ""
-
-        # Parse data if formatted like your example
-        if "**Symptoms:**" in text:
-            try:
-                symptoms = text.split("**Symptoms:**")[1].split("**Prevention:**")[0].strip()
-            except:
-                symptoms = ""
-
-        if "**Prevention:**" in text:
-            try:
-                prevention = text.split("**Prevention:**")[1].strip()
-            except:
-                prevention = ""
-
-        disease.symptoms = symptoms
-        disease.prevention = prevention
-        disease.save()
+    manager = CropDisease.objects.using(schema_editor.connection.alias)
+    diseases = (
+        manager.only('disease_id', 'disease_characteristics', 'symptoms', 'prevention')
+        .order_by('pk')
+    )
+
+    # Pk-ordered batches with one UPDATE per batch, instead of loading the
+    # whole table and saving row by row. Self-contained (no imports from
+    # core) so later changes to the app cannot alter this migration.
+    last_pk = None
+    while True:
+        batch_qs = diseases if last_pk is None else diseases.filter(pk__gt=last_pk)
+        batch = list(batch_qs[:BATCH_SIZE])
+        if not batch:
+            break
+        changed = [disease for disease in batch if split_text(disease)]
+        if changed:
+            manager.bulk_update(changed, ['symptoms', 'prevention'])
+        last_pk = batch[-1].pk
 
 def reverse(apps, schema_editor):
     pass  # we don't need rollback logic
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:46
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_user_stats(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    UserStat = apps.get_model('core', 'UserStat')
+    db = schema_editor.connection.alias
+
+    totals = {}
+    rows = (
+        User.objects.using(db)
+        .values_list('country', 'county', 'role', 'consent')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for country, county, role, consent, n in rows:
+        key = (country, county or '', role, consent)
+        totals[key] = totals.get(key, 0) + n
+
+    UserStat.objects.using(db).bulk_create([
+        UserStat(country=country, county=county, role=role, consent=consent, total=total)
+        for (country, county, role, consent), total in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_remove_cropdisease_disease_characteristics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(choices=[('Kenya', 'Kenya'), ('Other', 'Other')], max_length=20)),
+                ('county', models.CharField(blank=True, default='', max_length=50)),
+                ('role', models.CharField(choices=[('farmer', 'Farmer'), ('extension_officer', 'Extension Officer'), ('researcher', 'Researcher')], max_length=20)),
+                ('consent', models.BooleanField()),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('country', 'county', 'role', 'consent'), name='unique_user_stat_key')],
+            },
+        ),
+        migrations.RunPython(populate_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_userstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiseaseAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('disease', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='core.cropdisease')),
+            ],
+            options={
+                'verbose_name_plural': 'disease aliases',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:14
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiagnosisEvent',
+            fields=[
+                ('event_id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('disease_label', models.CharField(max_length=100)),
+                ('confidence', models.FloatField(validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)])),
+                ('detected_at', models.DateTimeField()),
+                ('county', models.CharField(blank=True, max_length=50, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='diagnosis_events', to='core.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['county', 'detected_at'], name='diagnosis_county_time'), models.Index(fields=['disease_label', 'detected_at'], name='diagnosis_label_time')],
+            },
+        ),
+    ]
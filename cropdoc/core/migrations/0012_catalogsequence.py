@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_sequence(apps, schema_editor):
+    CatalogChange = apps.get_model('core', 'CatalogChange')
+    CatalogSequence = apps.get_model('core', 'CatalogSequence')
+    db = schema_editor.connection.alias
+    latest = CatalogChange.objects.using(db).aggregate(v=Max('seq'))['v'] or 0
+    CatalogSequence.objects.using(db).update_or_create(pk=1, defaults={'value': latest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_diagnosisevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='catalogchange',
+            name='seq',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(seed_sequence, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,140 @@
 import uuid
-from django.db import models
+from collections import Counter
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, router, transaction
+from django.db.models import Count, F
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# User Stat Rollup
+# ─────────────────────────────────────────────────────────────────────────────
+USER_STAT_FIELDS = ('country', 'county', 'role', 'consent')
+
+
+def user_stat_key(country, county, role, consent):
+    """
+    Rollup key for a user. A missing county is stored as '' so the key
+    can take part in a unique constraint.
+    """
+    return (country, county or '', role, bool(consent))
+
+
+def _count_by_stat_key(queryset):
+    counts = Counter()
+    rows = queryset.order_by().values_list(*USER_STAT_FIELDS).annotate(n=Count('pk'))
+    for *key, n in rows:
+        counts[user_stat_key(*key)] += n
+    return counts
+
+
+def _diff(before, after):
+    """
+    Per-key change between two counters, keeping negative values
+    (Counter subtraction would drop them).
+    """
+    return {key: after[key] - before[key] for key in before.keys() | after.keys()}
+
+
+class UserQuerySet(models.QuerySet):
+    """
+    Keeps `UserStat` in step with bulk writes, which bypass `User.save()`
+    and `User.delete()`. `bulk_update()` is covered by `update()`, which
+    Django uses to implement it.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Only rows that were actually inserted or changed count.
+                affected = self.model.objects.using(self.db).filter(pk__in=[o.pk for o in objs])
+                before = _count_by_stat_key(affected)
+                result = super().bulk_create(objs, *args, **kwargs)
+                deltas = _diff(before, _count_by_stat_key(affected))
+            else:
+                result = super().bulk_create(objs, *args, **kwargs)
+                deltas = Counter(obj.stat_key for obj in objs)
+            UserStat.objects.using(self.db).apply_deltas(deltas)
+        for obj in objs:
+            obj._saved_stat_key = obj.stat_key
+        return result
+
+    def update(self, **kwargs):
+        touched = set(USER_STAT_FIELDS).intersection(kwargs)
+        if not touched:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            if any(hasattr(kwargs[f], 'resolve_expression') for f in touched):
+                # Expression updates: re-count the same rows afterwards.
+                pks = list(self.values_list('pk', flat=True))
+                affected = self.model.objects.using(self.db).filter(pk__in=pks)
+                before = _count_by_stat_key(affected)
+                result = super().update(**kwargs)
+                after = _count_by_stat_key(affected)
+            else:
+                # Constant updates: every matched key maps to a known new key.
+                before = _count_by_stat_key(self)
+                result = super().update(**kwargs)
+                after = Counter()
+                for key, n in before.items():
+                    values = dict(zip(USER_STAT_FIELDS, key))
+                    values.update({f: kwargs[f] for f in touched})
+                    after[user_stat_key(**values)] += n
+            UserStat.objects.using(self.db).apply_deltas(_diff(before, after))
+        return result
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            before = _count_by_stat_key(self)
+            result = super().delete()
+            UserStat.objects.using(self.db).apply_deltas(
+                {key: -n for key, n in before.items()}
+            )
+        return result
+
+
+class UserStatQuerySet(models.QuerySet):
+
+    def apply_deltas(self, deltas):
+        """
+        Add each (key -> delta) to the stored totals, creating rows for
+        keys seen for the first time. Call inside the writing transaction.
+        """
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            lookup = dict(zip(USER_STAT_FIELDS, key))
+            if self.filter(**lookup).update(total=F('total') + delta):
+                continue
+            _, created = self.get_or_create(defaults={'total': delta}, **lookup)
+            if not created:
+                self.filter(**lookup).update(total=F('total') + delta)
+
+    def reconcile(self, dry_run=False):
+        """
+        Recount users from scratch and fix any rollup rows that drifted.
+        Returns {key: (stored, actual)} for every key that differed.
+        """
+        with transaction.atomic(using=self.db):
+            # Lock existing rows so concurrent writers queue behind the recount.
+            stored = {
+                user_stat_key(*row[:-1]): row[-1]
+                for row in self.select_for_update().values_list(*USER_STAT_FIELDS, 'total')
+            }
+            actual = _count_by_stat_key(User.objects.using(self.db))
+            drift = {
+                key: (stored.get(key, 0), actual.get(key, 0))
+                for key in stored.keys() | actual.keys()
+                if stored.get(key, 0) != actual.get(key, 0)
+            }
+            if not dry_run:
+                for key, (_, total) in drift.items():
+                    self.update_or_create(
+                        defaults={'total': total}, **dict(zip(USER_STAT_FIELDS, key))
+                    )
+                self.filter(total=0).delete()
+        return drift
+
 
 class User(models.Model):
     ROLE_CHOICES = [
@@ -19,9 +154,78 @@ class User(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     consent = models.BooleanField()
 
+    objects = UserQuerySet.as_manager()
+
+    # Rollup key as last read from or written to the database.
+    _saved_stat_key = None
+
     def __str__(self):
         return f"{self.name} ({self.role})"
 
+    @property
+    def stat_key(self):
+        return user_stat_key(self.country, self.county, self.role, self.consent)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(USER_STAT_FIELDS).issubset(field_names):
+            instance._saved_stat_key = instance.stat_key
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(USER_STAT_FIELDS).intersection(update_fields):
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(User, instance=self)
+        with transaction.atomic(using=using):
+            previous = self._saved_stat_key
+            if previous is None and not self._state.adding:
+                row = User.objects.using(using).filter(pk=self.pk).values_list(*USER_STAT_FIELDS).first()
+                previous = user_stat_key(*row) if row else None
+            super().save(*args, **kwargs)
+            deltas = Counter({self.stat_key: 1})
+            if previous is not None:
+                deltas[previous] -= 1
+            UserStat.objects.using(using).apply_deltas(deltas)
+        self._saved_stat_key = self.stat_key
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(User, instance=self)
+        with transaction.atomic(using=using):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            UserStat.objects.using(using).apply_deltas(
+                {self._saved_stat_key or self.stat_key: -1}
+            )
+        self._saved_stat_key = None
+        return result
+
+
+class UserStat(models.Model):
+    """
+    Pre-aggregated user counts per (country, county, role, consent),
+    maintained transactionally by `User` and `UserQuerySet` writes.
+    """
+    country = models.CharField(max_length=20, choices=User.COUNTRY_CHOICES)
+    county = models.CharField(max_length=50, blank=True, default='')
+    role = models.CharField(max_length=20, choices=User.ROLE_CHOICES)
+    consent = models.BooleanField()
+    total = models.BigIntegerField(default=0)
+
+    objects = UserStatQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['country', 'county', 'role', 'consent'],
+                name='unique_user_stat_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.country}/{self.county or '-'}/{self.role}/{self.consent}: {self.total}"
+
 
 
 class Crop(models.Model):
@@ -41,6 +245,21 @@ class CropDisease(models.Model):
     prevention = models.TextField(null=True, blank=True)
 
 
+class DiseaseAlias(models.Model):
+    """
+    Alternative label for a disease, e.g. a class name emitted by an older
+    classifier version. Used by the name resolution index.
+    """
+    alias = models.CharField(max_length=100, unique=True)
+    disease = models.ForeignKey(CropDisease, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        verbose_name_plural = 'disease aliases'
+
+    def __str__(self):
+        return f"{self.alias} -> {self.disease.disease_name}"
+
+
 class DiseaseTreatment(models.Model):
     drug_id = models.AutoField(primary_key=True)
     disease = models.ForeignKey(CropDisease, on_delete=models.CASCADE, related_name='treatments')
@@ -50,3 +269,91 @@ class DiseaseTreatment(models.Model):
 
     def __str__(self):
         return f"{self.drug_name} for {self.disease.disease_name}"
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only log of catalog writes, used for offline delta sync. `seq`
+    is the sync version clients hold; a delete leaves a tombstone here.
+    Seqs come from `CatalogSequence`, not an autoincrement, so they are
+    in commit order.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+    MODEL_CHOICES = [
+        ('crop', 'Crop'),
+        ('disease', 'Crop disease'),
+        ('treatment', 'Disease treatment'),
+    ]
+
+    seq = models.BigIntegerField(primary_key=True)
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.seq} {self.action} {self.model} {self.object_id}"
+
+
+class CatalogSequence(models.Model):
+    """
+    Single-row counter handing out `CatalogChange.seq` values. Writers
+    bump it in the transaction that inserts their changes, so its row
+    lock makes seqs follow commit order: a client that has seen seq N can
+    never later find an uncommitted N-1 become visible and miss it.
+    """
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.value)
+
+
+class BackfillCheckpoint(models.Model):
+    """
+    Progress of a named backfill (see core/backfill.py), so an
+    interrupted run resumes after the last committed batch.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.CharField(max_length=64, null=True, blank=True)
+    processed = models.BigIntegerField(default=0)
+    updated = models.BigIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        state = 'done' if self.completed_at else f'after pk {self.last_pk}'
+        return f"{self.name} ({state})"
+
+
+class DiagnosisEvent(models.Model):
+    """
+    One disease detection reported by the app. Written in batches by the
+    write-behind buffer in core/events.py. `event_id` is generated by the
+    client, so a re-sent event is stored once.
+    """
+    event_id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    # A log keeps the reported id: no constraint (an unknown id must not
+    # fail the whole batch) and nothing cascades from user deletion.
+    user = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='diagnosis_events',
+    )
+    disease_label = models.CharField(max_length=100)
+    confidence = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
+    detected_at = models.DateTimeField()
+    county = models.CharField(max_length=50, blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['county', 'detected_at'], name='diagnosis_county_time'),
+            models.Index(fields=['disease_label', 'detected_at'], name='diagnosis_label_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.disease_label} ({self.confidence:.2f}) at {self.detected_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,68 @@
+# core/oncommit.py
+#
+# `transaction.on_commit` callbacks queued at most once per transaction
+# (or savepoint) level. What has been queued is tracked here rather than
+# read back from Django's private `connection.run_on_commit`.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import weakref
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.db import transaction
+
+
+# connection -> {(key, savepoint level): callback}. Values are weak: the
+# on_commit queue holds the only strong reference, so an entry goes away
+# once its savepoint is rolled back or its callback has run.
+_queued = weakref.WeakKeyDictionary()
+
+
+class _Queued:
+    __slots__ = ("func", "done", "__weakref__")
+
+    def __init__(self, func):
+        self.func = func
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        return self.func()
+
+
+def _level(connection):
+    # `atomic(savepoint=False)` pushes None: such a block commits or rolls
+    # back with the enclosing one, so it is not a level of its own.
+    return tuple(sid for sid in connection.savepoint_ids if sid is not None)
+
+
+def on_commit_once(key, factory=None, using=None, enclosing=True):
+    """
+    Return the callback queued under `key` at the current savepoint level,
+    queueing `factory()` (or `key` itself, without a factory) with
+    `transaction.on_commit` if there is none.
+
+    With `enclosing`, one queued at an enclosing level also counts: it
+    cannot commit without this one. Callers that collect state in the
+    callback pass `enclosing=False`, since an enclosing callback would
+    keep that state through a rollback of this savepoint.
+
+    Outside a transaction the callback runs at once and None is returned.
+    """
+    factory = factory or (lambda: key)
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        transaction.on_commit(factory(), using=using)
+        return None
+
+    queued = _queued.setdefault(connection, weakref.WeakValueDictionary())
+    level = _level(connection)
+    levels = [level[:i] for i in range(len(level) + 1)] if enclosing else [level]
+    for candidate in levels:
+        callback = queued.get((key, candidate))
+        if callback is not None and not callback.done:
+            return callback.func
+
+    callback = _Queued(factory())
+    queued[(key, level)] = callback
+    transaction.on_commit(callback, using=using)
+    return callback.func
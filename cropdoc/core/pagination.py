@@ -0,0 +1,67 @@
+# core/pagination.py
+
+import bisect
+import operator
+
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on each model's primary key (`user_id`,
+    `crop_id`, `disease_id`, `drug_id`).
+
+    Pages are fetched with `WHERE pk > cursor ORDER BY pk LIMIT n`, so no
+    OFFSET scan and no COUNT(*) is run, and deep pages cost the same as
+    the first one. Cursors are opaque, base64-encoded positions.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return (queryset.model._meta.pk.attname,)
+
+
+class SortedRows:
+    """
+    Pre-serialized rows (dicts) of `model`, in primary-key order, that
+    `KeysetPagination` can page like a queryset, e.g. the catalog
+    snapshot. Supports just what `CursorPagination` calls: ordering on
+    the pk, a `pk > / < position` filter (a binary search) and slicing.
+    """
+
+    def __init__(self, model, rows, descending=False):
+        self.model = model
+        self.rows = rows
+        self.descending = descending
+        self.key = model._meta.pk.attname
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def order_by(self, field):
+        descending = field.startswith("-")
+        if descending == self.descending:
+            return self
+        return SortedRows(self.model, self.rows[::-1], descending)
+
+    def filter(self, **lookup):
+        ((name, value),) = lookup.items()
+        field, op = name.rsplit("__", 1)
+        value = self.model._meta.get_field(field).to_python(value)
+        if self.descending:
+            sort_key, value = (lambda row: -row[self.key]), -value
+            op = {"gt": "lt", "lt": "gt"}[op]
+        else:
+            sort_key = operator.itemgetter(self.key)
+        if op == "gt":
+            rows = self.rows[bisect.bisect_right(self.rows, value, key=sort_key):]
+        else:
+            rows = self.rows[:bisect.bisect_left(self.rows, value, key=sort_key)]
+        return SortedRows(self.model, rows, self.descending)
@@ -0,0 +1,278 @@
+# core/profiling.py
+#
+# Opt-in per-request timing breakdown.
+#
+# With settings.SERVER_TIMING every response gets a Server-Timing header
+# splitting the time into db, serialize, render and total. A request can
+# also opt in with the X-Server-Timing header (see `_header_allows`);
+# those responses also carry an X-Debug-Id, and
+# GET /api/debug/requests/<id>/ returns the JSON sidecar: every SQL
+# statement with its duration and duplicate flags, and, if
+# X-Server-Timing-Profile was sent, collapsed stacks from a sampling
+# profiler (flamegraph.pl / speedscope input).
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .metrics import observe_queries
+
+
+SIDECAR_CACHE_PREFIX = "core:debug-request:"
+# Statements a template may repeat before it is flagged as a likely N+1.
+N_PLUS_ONE_THRESHOLD = 3
+
+
+def _header_allows(request, header):
+    """
+    The header opts a request in when its value matches
+    settings.SERVER_TIMING_TOKEN. Without a token nothing is opted in:
+    DEBUG is no guard, the sidecars expose every query's parameters.
+    """
+    value = request.META.get(header)
+    token = getattr(settings, "SERVER_TIMING_TOKEN", None)
+    if not value or not token:
+        return False
+    return constant_time_compare(value, token)
+
+
+def render_timed(request, response):
+    """
+    Render a template response now, timed as the `render` phase. For
+    wrappers that render inside the view (core.compression), whose
+    responses `process_template_response` never sees.
+    """
+    timing = getattr(request, "_server_timing", None)
+    if timing is not None:
+        timing["view_end"] = time.perf_counter()
+    response.render()
+    if timing is not None:
+        timing["render_end"] = time.perf_counter()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Collectors
+# ─────────────────────────────────────────────────────────────────────────────
+class QueryLog:
+    """
+    Query observer (see `metrics.observe_queries`) keeping each statement
+    and its time.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.duration = 0.0
+
+    def __call__(self, sql, params, many, context, seconds):
+        self.duration += seconds
+        self.queries.append({
+            "alias": context["connection"].alias,
+            "sql": sql,
+            "params": repr(params),
+            "many": many,
+            "ms": round(seconds * 1000, 3),
+        })
+
+    def report(self):
+        """
+        Statements with `repeats` (executions of the same SQL template),
+        `duplicate` (same template and parameters seen earlier) and
+        `n_plus_one` (template repeated N_PLUS_ONE_THRESHOLD+ times).
+        """
+        templates = Counter(q["sql"] for q in self.queries)
+        seen = set()
+        for query in self.queries:
+            exact = (query["sql"], query["params"])
+            query["repeats"] = templates[query["sql"]]
+            query["duplicate"] = exact in seen
+            query["n_plus_one"] = query["repeats"] >= N_PLUS_ONE_THRESHOLD
+            seen.add(exact)
+        return self.queries
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread from a background thread and counts
+    collapsed stacks ("module:func;module:func <count>").
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="server-timing-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────────────────────
+class ServerTimingMiddleware:
+    """
+    Adds Server-Timing to timed responses, and X-Debug-Id plus a cached
+    sidecar to requests opted in by header.
+
+    Phases: `db` is time in SQL; `serialize` is the rest of the view
+    (view code and serializers, which run inside the view for DRF);
+    `render` is the template-response render that Django runs after
+    process_template_response, timed up to its post-render callback, or
+    the render a wrapper runs itself through `render_timed`. A response
+    served from pre-compressed bytes runs no view, so all its time is
+    `serialize`.
+    Under ASGI the profiler samples the event-loop thread, so concurrent
+    requests show up in each other's stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.start(request)
+        if state is None:
+            return self.get_response(request)
+        try:
+            with observe_queries(state["log"]):
+                response = self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        if state is None:
+            return await self.get_response(request)
+        try:
+            with observe_queries(state["log"]):
+                response = await self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        opted_in = _header_allows(request, "HTTP_X_SERVER_TIMING")
+        if not opted_in and not getattr(settings, "SERVER_TIMING", False):
+            return None
+
+        request._server_timing = timing = {"view_end": None, "render_end": None}
+        profiler = None
+        if opted_in and _header_allows(request, "HTTP_X_SERVER_TIMING_PROFILE"):
+            interval = getattr(settings, "SERVER_TIMING_PROFILE_INTERVAL", 0.005)
+            profiler = SamplingProfiler(interval).start()
+        return {
+            "opted_in": opted_in,
+            "timing": timing,
+            "log": QueryLog(),
+            "profiler": profiler,
+            "started": time.perf_counter(),
+        }
+
+    def stop(self, state):
+        state["ended"] = time.perf_counter()
+        if state["profiler"] is not None:
+            state["profiler"].stop()
+
+    def finish(self, request, response, state):
+        log, timing, profiler = state["log"], state["timing"], state["profiler"]
+        started, ended = state["started"], state["ended"]
+
+        view_end = timing["view_end"] or ended
+        render = (timing["render_end"] - view_end) if timing["render_end"] else 0.0
+        phases = [
+            ("db", log.duration, f"{len(log.queries)} queries"),
+            ("serialize", max(view_end - started - log.duration, 0.0), None),
+            ("render", render, None),
+            ("total", ended - started, None),
+        ]
+        response["Server-Timing"] = ", ".join(
+            f"{name};dur={seconds * 1000:.2f}" + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in phases
+        )
+
+        if not state["opted_in"]:
+            return response
+
+        debug_id = uuid.uuid4().hex
+        response["X-Debug-Id"] = debug_id
+        cache.set(
+            SIDECAR_CACHE_PREFIX + debug_id,
+            {
+                "id": debug_id,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "timings_ms": {name: round(seconds * 1000, 3) for name, seconds, _ in phases},
+                "queries": log.report(),
+                "profile": profiler.collapsed() if profiler is not None else None,
+            },
+            getattr(settings, "SERVER_TIMING_SIDECAR_TTL", 300),
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, "_server_timing", None)
+        if timing is not None:
+            timing["view_end"] = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timing.__setitem__("render_end", time.perf_counter())
+            )
+        return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Debug Sidecar
+# ─────────────────────────────────────────────────────────────────────────────
+@require_GET
+def debug_request(request, debug_id):
+    """
+    The JSON sidecar of an opted-in request, or its collapsed profile
+    stacks with ?format=collapsed. Requires the same opt-in as the
+    request itself.
+    """
+    if not _header_allows(request, "HTTP_X_SERVER_TIMING"):
+        raise Http404
+    sidecar = cache.get(SIDECAR_CACHE_PREFIX + debug_id)
+    if sidecar is None:
+        raise Http404
+    if request.GET.get("format") == "collapsed":
+        return HttpResponse(sidecar["profile"] or "", content_type="text/plain; charset=utf-8")
+    return JsonResponse(sidecar)
@@ -0,0 +1,223 @@
+# core/resolver.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+
+# Below this similarity a fuzzy candidate is not accepted as a match.
+MIN_FUZZY_SCORE = 0.75
+# How many trigram candidates get the (more expensive) edit-distance check.
+MAX_FUZZY_CANDIDATES = 4
+# Trigram posting lists up to this size are always used for candidates.
+MIN_SELECTIVE_POSTING = 64
+# Resolved labels remembered per index; classifier labels repeat a lot.
+RESOLVE_CACHE_SIZE = 1024
+
+# Word-level spelling variants, applied after lower-casing.
+SPELLING_VARIANTS = {
+    "gray": "grey",
+    "colour": "color",
+    "mould": "mold",
+}
+
+_PARENTHESES_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Normalization
+# ─────────────────────────────────────────────────────────────────────────────
+def normalize_name(name):
+    """
+    Reduce a disease label to a comparison key: lower-case, accents and
+    parenthesised qualifiers like "(Fungal)" removed, spelling variants
+    unified and all spaces/punctuation dropped, so "Fall armyworm (pest)"
+    and "Fall Army-Worm" both become "fallarmyworm".
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    name = name.encode("ascii", "ignore").decode().lower()
+    name = _PARENTHESES_RE.sub(" ", name)
+    words = _NON_ALNUM_RE.split(name)
+    return "".join(SPELLING_VARIANTS.get(word, word) for word in words)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a, b):
+    """
+    Edit distance using Hyyrö's bit-parallel variant of Myers' algorithm:
+    one pass over `b` with a handful of integer operations per character.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b)
+
+    match_masks = {}
+    for i, ch in enumerate(a):
+        match_masks[ch] = match_masks.get(ch, 0) | (1 << i)
+
+    mask = (1 << len(a)) - 1
+    high = 1 << (len(a) - 1)
+    pv, mv, distance = mask, 0, len(a)
+    for ch in b:
+        eq = match_masks.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            distance += 1
+        elif mh & high:
+            distance -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return distance
+
+
+def similarity(a, b):
+    """
+    Normalized Levenshtein similarity in [0, 1].
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return 1.0 - levenshtein(a, b) / max(len(a), len(b))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Resolution Index
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class NameMatch:
+    disease_id: int
+    disease_name: str
+    matched: str   # the name or alias that matched
+    score: float
+    method: str    # "exact", "alias" or "fuzzy"
+
+    def as_dict(self):
+        return {
+            "disease_id": self.disease_id,
+            "disease_name": self.disease_name,
+            "matched": self.matched,
+            "score": round(self.score, 3),
+            "method": self.method,
+        }
+
+
+class DiseaseNameIndex:
+    """
+    In-memory index resolving free-text disease labels to diseases.
+
+    Exact (normalized) hits are a dict lookup. Otherwise candidates are
+    gathered from a trigram posting index, so only entries sharing at
+    least one trigram with the query are considered, and the best few are
+    scored by edit distance.
+    """
+
+    def __init__(self, diseases, aliases=()):
+        """
+        `diseases` is an iterable of (disease_id, disease_name) and
+        `aliases` of (alias, disease_id). Disease names take precedence
+        over aliases, and lower ids over higher ones.
+        """
+        self._entries = {}   # key -> (disease_id, matched text, method)
+        self._names = {}     # disease_id -> canonical name
+        self._postings = {}  # trigram -> set of keys
+        self._sizes = {}     # key -> number of distinct trigrams
+        self._resolved = {}  # query key -> NameMatch or None
+
+        for disease_id, disease_name in sorted(diseases):
+            self._names[disease_id] = disease_name
+            self._add(normalize_name(disease_name), disease_id, disease_name, "exact")
+        for alias, disease_id in aliases:
+            if disease_id in self._names:
+                self._add(normalize_name(alias), disease_id, alias, "alias")
+
+    def _add(self, key, disease_id, text, method):
+        if not key or key in self._entries:
+            return
+        self._entries[key] = (disease_id, text, method)
+        grams = trigrams(key)
+        self._sizes[key] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def _match(self, key, score, method=None):
+        disease_id, text, entry_method = self._entries[key]
+        return NameMatch(
+            disease_id=disease_id,
+            disease_name=self._names[disease_id],
+            matched=text,
+            score=score,
+            method=method or entry_method,
+        )
+
+    def candidates(self, name, limit=3):
+        """
+        Return up to `limit` scored matches for `name`, best first,
+        regardless of MIN_FUZZY_SCORE.
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+
+        grams = trigrams(key)
+        postings = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings),
+            key=len,
+        )
+        # Trigrams shared by a large part of the catalog say little about
+        # which entry is meant; skip them so a lookup never degrades into
+        # a scan of every entry.
+        max_posting = max(MIN_SELECTIVE_POSTING, len(self._entries) // 20)
+        selective = [p for p in postings if len(p) <= max_posting] or postings[:1]
+        shared = Counter()
+        for posting in selective:
+            shared.update(posting)
+
+        def jaccard(item):
+            other, n = item
+            return n / (len(grams) + self._sizes[other] - n)
+
+        shortlist = heapq.nlargest(MAX_FUZZY_CANDIDATES, shared.items(), key=jaccard)
+
+        best = {}
+        for other, _ in shortlist:
+            match = self._match(
+                other,
+                similarity(key, other),
+                None if other == key else "fuzzy",
+            )
+            current = best.get(match.disease_id)
+            if current is None or match.score > current.score:
+                best[match.disease_id] = match
+        return sorted(best.values(), key=lambda m: m.score, reverse=True)[:limit]
+
+    def resolve(self, name):
+        """
+        Resolve `name` to a single NameMatch, or None when nothing is
+        close enough.
+        """
+        key = normalize_name(name)
+        if key in self._entries:
+            return self._match(key, 1.0)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        matches = self.candidates(name, limit=1)
+        match = matches[0] if matches and matches[0].score >= MIN_FUZZY_SCORE else None
+        if len(self._resolved) < RESOLVE_CACHE_SIZE:
+            self._resolved[key] = match
+        return match
@@ -0,0 +1,120 @@
+# core/search.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import heapq
+import math
+import re
+from collections import Counter
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .resolver import SPELLING_VARIANTS
+
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+# Symptoms describe what the officer sees, so they outweigh prevention text.
+FIELD_WEIGHTS = {
+    "disease_name": 2.0,
+    "symptoms": 1.0,
+    "prevention": 0.3,
+}
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or
+    the their there these this to was were which with
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tokenization
+# ─────────────────────────────────────────────────────────────────────────────
+def _stem(word):
+    """
+    Fold plurals only ("lesions" -> "lesion", "leaves" -> "leaf"); enough
+    for symptom text without pulling in a full stemmer.
+    """
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("ves"):
+        return word[:-3] + "f"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    words = _TOKEN_RE.findall((text or "").lower())
+    return [
+        _stem(SPELLING_VARIANTS.get(word, word))
+        for word in words
+        if word not in STOPWORDS
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Inverted Index
+# ─────────────────────────────────────────────────────────────────────────────
+class SymptomIndex:
+    """
+    Precomputed BM25 inverted index over disease names, symptoms and
+    prevention text. Built once per catalog version; a query touches only
+    the posting lists of its own terms.
+    """
+
+    def __init__(self, diseases):
+        """
+        `diseases` is an iterable of serialized CropDisease dicts.
+        """
+        self._docs = []
+        self._postings = {}   # term -> [(doc index, weighted tf)]
+        lengths = []
+
+        for doc, disease in enumerate(diseases):
+            self._docs.append(disease)
+            tf = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(disease.get(field)):
+                    tf[term] += weight
+            lengths.append(sum(tf.values()))
+            for term, freq in tf.items():
+                self._postings.setdefault(term, []).append((doc, freq))
+
+        n = len(self._docs)
+        avg_length = (sum(lengths) / n) if n else 0.0
+        self._norms = [
+            K1 * (1 - B + B * (length / avg_length)) if avg_length else K1
+            for length in lengths
+        ]
+        self._idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self._postings.items()
+        }
+
+    def search(self, query, crop_id=None, limit=10):
+        """
+        Rank diseases for a free-text symptom description. Returns
+        [(score, disease dict, matched terms)], best first.
+        """
+        terms = set(tokenize(query))
+        scores = Counter()
+        matched = {}
+        for term in terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, freq in self._postings[term]:
+                if crop_id is not None and self._docs[doc]["crop"] != crop_id:
+                    continue
+                scores[doc] += idf * freq * (K1 + 1) / (freq + self._norms[doc])
+                matched.setdefault(doc, []).append(term)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self._docs[doc], sorted(matched[doc])) for doc, score in top]
@@ -1,5 +1,8 @@
+import math
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import User, Crop, CropDisease, DiseaseTreatment
+from .models import User, Crop, CropDisease, DiseaseTreatment, DiagnosisEvent
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,6 +10,39 @@ class UserSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class BulkUserSerializer(UserSerializer):
+    """
+    Row serializer for bulk registration. Unlike `UserSerializer` it
+    accepts an optional client-generated `user_id`, so retried uploads
+    are idempotent.
+    """
+    user_id = serializers.UUIDField(required=False)
+
+    class Meta(UserSerializer.Meta):
+        pass
+
+
+class DiagnosisEventSerializer(serializers.ModelSerializer):
+    """
+    Incoming diagnosis event. `user` is taken as a plain id (no lookup per
+    event) and `event_id` should be generated by the client, so re-sent
+    events are stored once.
+    """
+    event_id = serializers.UUIDField(required=False)
+    user = serializers.UUIDField(source="user_id", required=False, allow_null=True)
+    detected_at = serializers.DateTimeField(default=timezone.now)
+
+    class Meta:
+        model = DiagnosisEvent
+        fields = ["event_id", "user", "disease_label", "confidence", "detected_at", "county"]
+
+    def validate_confidence(self, value):
+        # "NaN" parses as a float and passes both range validators.
+        if not math.isfinite(value):
+            raise serializers.ValidationError("A valid number is required.")
+        return value
+
+
 class CropSerializer(serializers.ModelSerializer):
     class Meta:
         model = Crop
@@ -37,3 +73,125 @@ class DiseaseTreatmentSerializer(serializers.ModelSerializer):
             "prevention",    # New
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join the disease row in the same query and load only the columns
+        this serializer emits, so listing N treatments is one query.
+        """
+        return queryset.select_related("disease").only(
+            "drug_id",
+            "drug_name",
+            "drug_administration_instructions",
+            "disease_id",
+            "crop_id",
+            "disease__disease_name",
+            "disease__symptoms",
+            "disease__prevention",
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Nested Crop Tree (sparse fieldsets)
+# ─────────────────────────────────────────────────────────────────────────────
+def parse_fields(value):
+    """
+    Parse a `?fields=` value of comma-separated dotted paths, e.g.
+    "crop_name,diseases.disease_name,diseases.treatments" into
+    {"crop_name": {}, "diseases": {"disease_name": {}, "treatments": {}}}.
+    """
+    tree = {}
+    for path in value.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Serializer keeping only the fields named in `fields`, a tree from
+    `parse_fields` (None keeps all). A nested serializer gets its subtree;
+    naming it without a subtree keeps all of its fields.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        self.sparse_fields = fields
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def check_fields(cls, tree, prefix=""):
+        """
+        Raise ValueError naming the first path this serializer lacks.
+        """
+        declared = cls().fields
+        for name, subtree in tree.items():
+            field = declared.get(name)
+            nested = getattr(field, "child", field)
+            if field is None:
+                raise ValueError(f"Unknown field: {prefix}{name}")
+            if subtree and not isinstance(nested, SparseFieldsMixin):
+                raise ValueError(f"Unknown field: {prefix}{name}.{next(iter(subtree))}")
+            if subtree:
+                type(nested).check_fields(subtree, f"{prefix}{name}.")
+
+    @classmethod
+    def columns(cls, tree):
+        """
+        Model fields to load for `tree`: the selected plain fields plus the
+        primary key. Returns (columns, {relation name: subtree or None}).
+        """
+        model = cls.Meta.model
+        columns, relations = {model._meta.pk.name}, {}
+        for name, field in cls().fields.items():
+            if tree is not None and name not in tree:
+                continue
+            nested = getattr(field, "child", field)
+            if isinstance(nested, SparseFieldsMixin):
+                relations[name] = (tree or {}).get(name) or None
+            else:
+                columns.add(field.source)
+        return columns, relations
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields is None:
+            return fields
+        selected = {}
+        for name, field in fields.items():
+            if name not in self.sparse_fields:
+                continue
+            nested = getattr(field, "child", field)
+            if isinstance(nested, SparseFieldsMixin):
+                nested.sparse_fields = self.sparse_fields[name] or None
+            selected[name] = field
+        return selected
+
+
+class TreatmentTreeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DiseaseTreatment
+        fields = ["drug_id", "drug_name", "drug_administration_instructions"]
+
+
+class DiseaseTreeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    treatments = TreatmentTreeSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = CropDisease
+        fields = ["disease_id", "disease_name", "symptoms", "prevention", "treatments"]
+
+
+class CropTreeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    A crop with its diseases and each disease's treatments, for one crop
+    screen. See `CropViewSet.full` for the matching prefetches.
+    """
+    diseases = DiseaseTreeSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Crop
+        fields = ["crop_id", "crop_name", "description", "diseases"]
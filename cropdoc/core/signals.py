@@ -0,0 +1,44 @@
+# core/signals.py
+
+from django.db.models.signals import post_delete, post_save
+
+from .catalog import bump_catalog_version
+from .models import CatalogChange, Crop, CropDisease, DiseaseAlias, DiseaseTreatment
+from .oncommit import on_commit_once
+from .sync import SYNC_NAMES, record_changes
+
+
+CATALOG_MODELS = (Crop, CropDisease, DiseaseAlias, DiseaseTreatment)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Invalidation
+# ─────────────────────────────────────────────────────────────────────────────
+def invalidate_catalog(sender, using=None, **kwargs):
+    """
+    Bump the catalog version whenever a catalog row is written or deleted:
+    once per transaction, however many rows it touched. The bump waits for
+    commit so no process rebuilds from uncommitted data.
+    """
+    on_commit_once(bump_catalog_version, using=using)
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=model)
+    post_delete.connect(invalidate_catalog, sender=model)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Change Tracking (offline sync)
+# ─────────────────────────────────────────────────────────────────────────────
+def record_upsert(sender, instance, using=None, **kwargs):
+    record_changes(sender, [instance.pk], CatalogChange.UPSERT, using=using)
+
+
+def record_delete(sender, instance, using=None, **kwargs):
+    record_changes(sender, [instance.pk], CatalogChange.DELETE, using=using)
+
+
+for model in SYNC_NAMES:
+    post_save.connect(record_upsert, sender=model)
+    post_delete.connect(record_delete, sender=model)
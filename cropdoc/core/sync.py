@@ -0,0 +1,241 @@
+# core/sync.py
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from urllib.parse import quote
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F, Max, Min
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework.renderers import JSONRenderer
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from .images import get_image_manifest
+from .models import CatalogChange, CatalogSequence, Crop, CropDisease, DiseaseTreatment
+from .oncommit import on_commit_once
+from .serializers import (
+    CropSerializer,
+    CropDiseaseSerializer,
+    DiseaseTreatmentSerializer,
+)
+
+
+# Sync name -> (model, serializer, queryset builder).
+SYNC_MODELS = {
+    "crop": (Crop, CropSerializer, lambda qs: qs),
+    "disease": (CropDisease, CropDiseaseSerializer, lambda qs: qs),
+    "treatment": (
+        DiseaseTreatment,
+        DiseaseTreatmentSerializer,
+        DiseaseTreatmentSerializer.setup_eager_loading,
+    ),
+}
+SYNC_NAMES = {model: name for name, (model, _, _) in SYNC_MODELS.items()}
+
+# Keys used in bundle and delta payloads.
+PAYLOAD_KEYS = {"crop": "crops", "disease": "diseases", "treatment": "treatments"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Change Tracking
+# ─────────────────────────────────────────────────────────────────────────────
+def _next_seqs(count, using):
+    """
+    Reserve `count` consecutive seqs. Must run inside the transaction
+    that inserts them: the counter row stays locked until it commits.
+    """
+    sequence = CatalogSequence.objects.using(using)
+    if not sequence.filter(pk=1).update(value=F("value") + count):
+        # Row missing (e.g. a flushed test database): start after the log.
+        latest = CatalogChange.objects.using(using).aggregate(v=Max("seq"))["v"] or 0
+        sequence.get_or_create(pk=1, defaults={"value": latest})
+        sequence.filter(pk=1).update(value=F("value") + count)
+    last = sequence.values_list("value", flat=True).get(pk=1)
+    return range(last - count + 1, last + 1)
+
+
+def _write_changes(changes, using):
+    """
+    Insert {(sync name, object id): action} as change-log rows with one
+    seq allocation and one bulk INSERT.
+    """
+    if not changes:
+        return
+    with transaction.atomic(using=using):
+        seqs = _next_seqs(len(changes), using)
+        CatalogChange.objects.using(using).bulk_create(
+            [
+                CatalogChange(seq=seq, model=name, object_id=object_id, action=action)
+                for seq, ((name, object_id), action) in zip(seqs, changes.items())
+            ],
+            batch_size=5000,
+        )
+
+
+class _PendingChanges:
+    """
+    Changes recorded at one transaction (or savepoint) level, written
+    when it commits. Registered with `on_commit`, so a rolled-back
+    savepoint discards its changes along with the callback.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.changes = {}
+
+    def __call__(self):
+        _write_changes(self.changes, self.using)
+
+
+def record_changes(model, object_ids, action, using=None):
+    """
+    Log changes to catalog objects. Signals call this for single-row
+    writes; bulk writers (which skip signals) call it directly.
+
+    Inside a transaction the ids are collected and written once after
+    commit, so deleting a crop with hundreds of children costs one INSERT,
+    and seqs are handed out in commit order. In autocommit they are
+    written at once.
+    """
+    if not object_ids:
+        return
+    name = SYNC_NAMES[model]
+    using = using or router.db_for_write(CatalogChange)
+    if not transaction.get_connection(using).in_atomic_block:
+        _write_changes({(name, object_id): action for object_id in object_ids}, using)
+        return
+
+    # One collector per savepoint level: one from an enclosing level would
+    # outlive a rollback of this one.
+    pending = on_commit_once(
+        _PendingChanges, lambda: _PendingChanges(using), using=using, enclosing=False
+    )
+    for object_id in object_ids:
+        # Last action per object wins, as in `build_delta`.
+        pending.changes[(name, object_id)] = action
+
+
+def get_sync_version(using=None):
+    return CatalogChange.objects.using(using).aggregate(v=Max("seq"))["v"] or 0
+
+
+def _serialize(name, ids=None):
+    model, serializer_class, prepare = SYNC_MODELS[name]
+    queryset = prepare(model.objects.order_by("pk"))
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return list(serializer_class(queryset, many=True).data)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Full Bundle
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class CatalogBundle:
+    version: int
+    manifest_etag: str
+    etag: str
+    identity: bytes
+    gzip: bytes
+
+
+def _sample_image_manifest():
+    """
+    Sample images with relative URLs, so the bundle does not depend on
+    the host it was requested from.
+    """
+    folder = os.path.join(settings.MEDIA_ROOT, "sample_images")
+    manifest = get_image_manifest(folder)
+    if manifest is None:
+        return "", []
+    prefix = settings.MEDIA_URL + "sample_images/"
+    images = [{**image, "url": prefix + quote(image["name"])} for image in manifest.images]
+    return manifest.etag, images
+
+
+def build_bundle(version, sample_images=None):
+    manifest_etag, images = sample_images or _sample_image_manifest()
+    payload = {"version": version}
+    for name, key in PAYLOAD_KEYS.items():
+        payload[key] = _serialize(name)
+    payload["sample_images"] = images
+
+    identity = JSONRenderer().render(payload)
+    etag = hashlib.blake2b(
+        f"{version}|{manifest_etag}".encode(), digest_size=12
+    ).hexdigest()
+    return CatalogBundle(
+        version=version,
+        manifest_etag=manifest_etag,
+        etag=etag,
+        identity=identity,
+        gzip=gzip.compress(identity, compresslevel=9, mtime=0),
+    )
+
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+
+def get_bundle():
+    """
+    Return the full catalog bundle, rebuilt only when the sync version
+    or the sample images move. The version is read before the rows, so
+    the rows are never older than the version the client is told it holds.
+    """
+    global _bundle
+
+    version = get_sync_version()
+    sample_images = _sample_image_manifest()
+    key = (version, sample_images[0])
+    bundle = _bundle
+    if bundle is not None and (bundle.version, bundle.manifest_etag) == key:
+        return bundle
+
+    with _bundle_lock:
+        if _bundle is None or (_bundle.version, _bundle.manifest_etag) != key:
+            _bundle = build_bundle(version, sample_images)
+        return _bundle
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Delta
+# ─────────────────────────────────────────────────────────────────────────────
+def build_delta(since):
+    """
+    Rows changed after sync version `since`: current values for upserts
+    and ids for deletes. Returns None when the change log no longer
+    reaches back to `since` (pruned), or `since` is ahead of it (restored
+    database), and the client must fetch the full bundle.
+    """
+    bounds = CatalogChange.objects.aggregate(oldest=Min("seq"), latest=Max("seq"))
+    latest = bounds["latest"] or 0
+    if since > latest:
+        return None
+    if bounds["oldest"] is not None and since + 1 < bounds["oldest"]:
+        return None
+
+    # Last action per object wins.
+    last_action = {}
+    changes = (
+        CatalogChange.objects.filter(seq__gt=since, seq__lte=latest)
+        .order_by("seq")
+        .values_list("model", "object_id", "action")
+    )
+    for name, object_id, action in changes.iterator():
+        last_action[(name, object_id)] = action
+
+    delta = {"version": latest, "since": since, "deleted": {}}
+    for name, key in PAYLOAD_KEYS.items():
+        upserts = [i for (n, i), a in last_action.items() if n == name and a == CatalogChange.UPSERT]
+        deletes = [i for (n, i), a in last_action.items() if n == name and a == CatalogChange.DELETE]
+        delta[key] = _serialize(name, upserts) if upserts else []
+        delta["deleted"][key] = sorted(deletes)
+    return delta
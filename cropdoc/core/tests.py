@@ -1,3 +1,1348 @@
-from django.test import TestCase
+# core/tests.py
 
-# Create your tests here.
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import csv
+import dataclasses
+import io
+import json
+import math
+import os
+import runpy
+import shutil
+import tempfile
+import time
+from collections import Counter
+from unittest import mock
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import AnonRateThrottle
+
+# ─── Local Imports ────────────────────────────────────────────────────────────
+from . import async_views, compression, db_router
+from .backfill import BACKFILLS
+from .bench import is_bench_database
+from .catalog import bump_catalog_version
+from .checks import check_catalog_cache
+from .db_router import STICKY_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from .events import EventBuffer
+from .fastpath import values_spec
+from .importer import ImportStats, import_catalog, read_catalog_csv
+from .models import (
+    BackfillCheckpoint,
+    CatalogChange,
+    Crop,
+    CropDisease,
+    DiagnosisEvent,
+    DiseaseAlias,
+    DiseaseTreatment,
+    User,
+    UserStat,
+)
+from .resolver import MIN_FUZZY_SCORE, DiseaseNameIndex, levenshtein, normalize_name
+from .search import B, FIELD_WEIGHTS, K1, SymptomIndex, tokenize
+from .serializers import CropDiseaseSerializer, DiagnosisEventSerializer
+from .sync import _PendingChanges, build_delta, get_sync_version
+from .views import (
+    MAX_BATCH_LABELS,
+    CropDiseaseViewSet,
+    CropViewSet,
+    DiseaseTreatmentViewSet,
+    UserViewSet,
+)
+
+
+TEST_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"cropdoc-tests-{alias}",
+    }
+    for alias in ("default", "catalog")
+}
+
+
+def isolated_caches(cls):
+    """
+    Run `cls` against in-memory caches, emptied before each test, instead
+    of the repo-local file caches shared with other runs and the dev
+    server.
+    """
+    cls = override_settings(CACHES=TEST_CACHES)(cls)
+    set_up = cls.setUp
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        set_up(self)
+
+    cls.setUp = setUp
+    return cls
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Replica Routing
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=5, REPLICA_RETRY_SECONDS=30)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing decisions for a primary and one replica. The replica alias is
+    not a real database here: these tests only check which alias the
+    router picks, with connections stubbed where one would be opened.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        db_router._unhealthy.clear()
+        self.addCleanup(db_router._unhealthy.clear)
+
+    def route(self, request, write=False):
+        """
+        Run `request` through the middleware; returns (read alias, response).
+        """
+        seen = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Crop)
+            seen["read"] = self.router.db_for_read(Crop)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen["read"], response
+
+    @mock.patch.object(db_router, "_usable", return_value=True)
+    def test_safe_request_reads_from_replica(self, _usable):
+        alias, response = self.route(self.factory.get("/api/users/"))
+        self.assertEqual(alias, "replica")
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_outside_requests_read_from_primary(self):
+        self.assertEqual(self.router.db_for_read(Crop), DEFAULT_DB_ALIAS)
+
+    @mock.patch.object(db_router, "_usable", return_value=True)
+    def test_use_primary_overrides_replica(self, _usable):
+        def view(request):
+            with db_router.use_primary():
+                return HttpResponse(self.router.db_for_read(Crop))
+
+        response = ReplicaRoutingMiddleware(view)(self.factory.get("/api/crops/"))
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
+
+    @mock.patch.object(db_router, "_usable", return_value=True)
+    def test_write_pins_client_to_primary(self, _usable):
+        alias, response = self.route(self.factory.post("/api/users/"), write=True)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], 5)
+
+        request = self.factory.get("/api/users/")
+        request.COOKIES[STICKY_COOKIE] = cookie.value
+        alias, _ = self.route(request)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+        request = self.factory.get("/api/users/")
+        request.COOKIES[STICKY_COOKIE] = str(time.time() - 1)
+        alias, _ = self.route(request)
+        self.assertEqual(alias, "replica")
+
+    @mock.patch.object(db_router, "_usable", return_value=True)
+    def test_write_during_safe_request_moves_later_reads(self, _usable):
+        alias, response = self.route(self.factory.get("/api/users/"), write=True)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        replica = mock.Mock()
+        replica.ensure_connection.side_effect = OperationalError("replica down")
+        primary = mock.Mock(in_atomic_block=False)
+        fake_connections = {"replica": replica, DEFAULT_DB_ALIAS: primary}
+
+        with mock.patch.object(db_router, "connections", fake_connections):
+            alias, _ = self.route(self.factory.get("/api/users/"))
+            self.assertEqual(alias, DEFAULT_DB_ALIAS)
+            replica.close.assert_called_once()
+
+            # Skipped without reconnecting until REPLICA_RETRY_SECONDS pass.
+            alias, _ = self.route(self.factory.get("/api/users/"))
+            self.assertEqual(alias, DEFAULT_DB_ALIAS)
+            self.assertEqual(replica.ensure_connection.call_count, 1)
+
+            replica.ensure_connection.side_effect = None
+            db_router._unhealthy["replica"] = time.monotonic() - 1
+            alias, _ = self.route(self.factory.get("/api/users/"))
+            self.assertEqual(alias, "replica")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(self.router.allow_migrate("replica", "core"), False)
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, "core"))
+
+
+@isolated_caches
+@override_settings(DATABASE_REPLICAS=["replica"], PRECOMPRESS_MAX_BYTES=0)
+class CatalogPrimaryReadTests(TransactionTestCase):
+    """
+    Views behind a catalog ETag must not read from a replica: any query
+    routed to the (nonexistent) replica alias would fail. Not a TestCase,
+    whose wrapping transaction already keeps every read on the primary.
+    """
+
+    @mock.patch.object(db_router, "_usable", return_value=True)
+    def test_catalog_views_read_from_primary(self, _usable):
+        crop = Crop.objects.create(crop_name="Beans")
+        for path in ("/api/crops/", f"/api/crops/{crop.pk}/", f"/api/crops/{crop.pk}/full/"):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Beans")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Keyset Pagination
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(PRECOMPRESS_MAX_BYTES=0)
+class KeysetPaginationTests(TestCase):
+
+    def walk(self, url):
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([row["crop_id"] for row in body["results"]])
+            url = body["next"]
+        return pages
+
+    def test_pages_cover_every_row_once(self):
+        ids = [c.pk for c in Crop.objects.bulk_create(Crop(crop_name=f"Crop {i}") for i in range(7))]
+        self.assertEqual(self.walk("/api/crops/?page_size=3"), [ids[:3], ids[3:6], ids[6:]])
+
+        # Rows deleted before the cursor or added after it do not shift the next page.
+        body = self.client.get("/api/crops/?page_size=3").json()
+        Crop.objects.filter(pk=ids[0]).delete()
+        Crop.objects.create(crop_name="Late")
+        self.assertEqual(
+            [row["crop_id"] for row in self.client.get(body["next"]).json()["results"]], ids[3:6]
+        )
+
+    def test_page_size_is_capped(self):
+        Crop.objects.bulk_create(Crop(crop_name=f"Crop {i}") for i in range(501))
+        body = self.client.get("/api/crops/?page_size=10000").json()
+        self.assertEqual(len(body["results"]), 500)
+        self.assertIsNotNone(body["next"])
+
+    def test_bad_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/api/crops/?cursor=bogus").status_code, 404)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Change Log
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class ChangeLogTests(TestCase):
+
+    def test_transaction_changes_are_written_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            crop = Crop.objects.create(crop_name="Maize")
+            disease = CropDisease.objects.create(crop=crop, disease_name="Rust")
+            for i in range(20):
+                DiseaseTreatment.objects.create(
+                    disease=disease, crop=crop, drug_name=f"Drug {i}",
+                    drug_administration_instructions="Spray",
+                )
+        since = get_sync_version()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            crop.delete()
+        self.assertEqual(get_sync_version(), since)
+        with self.assertNumQueries(5):   # savepoint, counter, read back, insert, release
+            for callback in callbacks:
+                callback()
+
+        delta = build_delta(since)
+        self.assertEqual(delta["version"], since + 22)
+        self.assertEqual(
+            {key: len(ids) for key, ids in delta["deleted"].items()},
+            {"crops": 1, "diseases": 1, "treatments": 20},
+        )
+
+    def test_one_collector_per_transaction_level(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            crop = Crop.objects.create(crop_name="Maize")
+            # Deletes run in atomic(savepoint=False), which is not a level.
+            Crop.objects.create(crop_name="Sorghum").delete()
+            CropDisease.objects.create(crop=crop, disease_name="Rust")
+        collectors = [c for c in callbacks if isinstance(c.func, _PendingChanges)]
+        self.assertEqual(len(collectors), 1)
+        self.assertEqual(CatalogChange.objects.count(), 3)
+
+    def test_rolled_back_savepoint_drops_its_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = Crop.objects.create(crop_name="Kept")
+            try:
+                with transaction.atomic():
+                    Crop.objects.create(crop_name="Gone")
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(
+            list(CatalogChange.objects.values_list("model", "object_id", "action")),
+            [("crop", kept.pk, CatalogChange.UPSERT)],
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Invalidation
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class CatalogInvalidationTests(TestCase):
+
+    def test_one_bump_per_transaction(self):
+        with mock.patch("core.signals.bump_catalog_version") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                crop = Crop.objects.create(crop_name="Maize")
+                for i in range(5):
+                    CropDisease.objects.create(crop=crop, disease_name=f"Disease {i}")
+                crop.delete()
+        self.assertEqual(bump.call_count, 1)
+
+    def test_savepoints_share_the_enclosing_bump(self):
+        def bumps(callbacks):
+            return [c for c in callbacks if getattr(c, "func", None) is bump_catalog_version]
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            crop = Crop.objects.create(crop_name="Maize")
+            with transaction.atomic():
+                CropDisease.objects.create(crop=crop, disease_name="Rust").delete()
+        self.assertEqual(len(bumps(callbacks)), 1)
+
+        # Once run, a bump no longer covers later writes.
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    Crop.objects.create(crop_name="Sorghum")
+                    raise ValueError
+            except ValueError:
+                pass
+            Crop.objects.create(crop_name="Millet")
+        self.assertEqual(len(bumps(callbacks)), 1)
+
+    def test_catalog_cache_must_be_shared(self):
+        local = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp"}
+        with override_settings(CACHES={"catalog": local}, CATALOG_CACHE_SINGLE_HOST=False):
+            self.assertEqual([e.id for e in check_catalog_cache()], ["core.W001"])
+        with override_settings(CACHES={"catalog": local}, CATALOG_CACHE_SINGLE_HOST=True):
+            self.assertEqual(check_catalog_cache(), [])
+        locmem = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(CACHES={"catalog": locmem}, CATALOG_CACHE_SINGLE_HOST=True):
+            self.assertEqual([e.id for e in check_catalog_cache()], ["core.E002"])
+
+
+class GunicornStartupTests(SimpleTestCase):
+    """
+    Runs against the settings as shipped (no isolated_caches), which the
+    stock `gunicorn --config gunicorn.conf.py` deploy must boot with.
+    """
+
+    def test_default_settings_pass_on_starting(self):
+        with mock.patch.dict(os.environ):
+            config = runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+        server = mock.Mock()
+        config["on_starting"](server)
+        server.log.error.assert_not_called()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pre-compression
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class PrecompressionTests(TestCase):
+
+    def setUp(self):
+        compression._entries.clear()
+        compression._entries_bytes = 0
+        for i in range(3):
+            Crop.objects.create(crop_name=f"Crop {i}")
+
+    def test_key_holds_only_read_parameters(self):
+        first = self.client.get("/api/crops/?page_size=2&utm=a")
+        second = self.client.get("/api/crops/?utm=b&page_size=2")
+        self.assertEqual(len(compression._entries), 1)
+        self.assertEqual(first.content, second.content)
+        self.assertNotIn("utm", first.json()["next"])
+        self.assertIn("page_size=2", first.json()["next"])
+
+    def test_store_is_bounded_by_bytes(self):
+        paths = [f"/api/crops/?page_size={size}" for size in (1, 2, 3)]
+        for path in paths:
+            self.client.get(path)
+        sizes = [entry.size for entry in compression._entries.values()]
+        compression._entries.clear()
+        compression._entries_bytes = 0
+
+        with override_settings(PRECOMPRESS_MAX_BYTES=sizes[1] + sizes[2]):
+            for path in paths:
+                self.client.get(path)
+        self.assertEqual([key[4] for key in compression._entries], ["page_size=2", "page_size=3"])
+        self.assertEqual(compression._entries_bytes, sizes[1] + sizes[2])
+
+    def test_views_with_access_checks_are_not_precompressed(self):
+        view = CropViewSet(permission_classes=[IsAuthenticated])
+        self.assertFalse(view.uses_precompression())
+        view = CropViewSet(throttle_classes=[AnonRateThrottle])
+        self.assertFalse(view.uses_precompression())
+        self.assertTrue(CropViewSet().uses_precompression())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Server-Timing
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class ServerTimingTests(TestCase):
+
+    @override_settings(DEBUG=True, SERVER_TIMING_TOKEN=None)
+    def test_header_needs_the_token(self):
+        response = self.client.get("/api/crops/", HTTP_X_SERVER_TIMING="1")
+        self.assertFalse(response.has_header("X-Debug-Id"))
+
+    @override_settings(SERVER_TIMING_TOKEN="s3cret")
+    def test_header_with_the_token_opts_in(self):
+        response = self.client.get("/api/crops/", HTTP_X_SERVER_TIMING="wrong")
+        self.assertFalse(response.has_header("X-Debug-Id"))
+        response = self.client.get("/api/crops/", HTTP_X_SERVER_TIMING="s3cret")
+        self.assertTrue(response.has_header("X-Debug-Id"))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_precompressed_miss_times_the_render(self):
+        compression._entries.clear()
+        compression._entries_bytes = 0
+        response = self.client.get("/api/crops/")
+        timing = response.wsgi_request._server_timing
+        self.assertIsNotNone(timing["render_end"])
+        self.assertGreaterEqual(timing["render_end"], timing["view_end"])
+        self.assertIn("render;dur=", response["Server-Timing"])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Diagnosis Events
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class DiagnosisEventTests(TransactionTestCase):
+    """
+    Not a TestCase: the buffer writes in autocommit, and a failed INSERT
+    inside the test transaction would break every later query.
+    """
+
+    def event(self, **fields):
+        return DiagnosisEvent(
+            disease_label="Common Rust", confidence=0.9, detected_at=timezone.now(), **fields
+        )
+
+    def test_non_finite_confidence_is_rejected(self):
+        for value in ("NaN", "Infinity", "-inf"):
+            with self.subTest(value=value):
+                serializer = DiagnosisEventSerializer(data={"disease_label": "Rust", "confidence": value})
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("confidence", serializer.errors)
+
+    def test_rejected_rows_are_dropped_not_retried(self):
+        buffer = EventBuffer(DiagnosisEvent, batch_size=10)
+        bad = self.event()
+        bad.confidence = "high"
+        buffer._pending.extend([self.event(), bad, self.event()])
+        with self.assertLogs("core.events", "ERROR") as logs:
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(DiagnosisEvent.objects.count(), 2)
+
+    def test_unreachable_database_requeues(self):
+        buffer = EventBuffer(DiagnosisEvent, batch_size=10)
+        buffer._pending.extend([self.event(), self.event()])
+        with mock.patch.object(DiagnosisEvent.objects, "using") as using:
+            using.return_value.bulk_create.side_effect = OperationalError("gone")
+            with self.assertLogs("core.events", "ERROR"):
+                self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer), 2)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# User Stat Rollup
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class UserStatRollupTests(TestCase):
+    """
+    Every write path of `User` must leave the rollup equal to a recount.
+    """
+
+    def user(self, name, **fields):
+        values = {"country": "Kenya", "county": "Nakuru", "role": "farmer", "consent": True}
+        values.update(fields)
+        return User(name=name, **values)
+
+    def assertRollupMatches(self):
+        self.assertEqual(UserStat.objects.reconcile(dry_run=True), {})
+
+    def test_save_create_and_update(self):
+        user = self.user("Wanjiku")
+        user.save()
+        self.assertRollupMatches()
+        user.role = "researcher"
+        user.county = None
+        user.save()
+        self.assertRollupMatches()
+        # Instance loaded without the rollup fields: the old key is read back.
+        partial = User.objects.only("name").get(pk=user.pk)
+        partial.consent = False
+        partial.save()
+        self.assertRollupMatches()
+
+    def test_delete(self):
+        user = self.user("Otieno")
+        user.save()
+        user.delete()
+        self.assertRollupMatches()
+        self.assertFalse(UserStat.objects.filter(total__gt=0).exists())
+
+    def test_bulk_create(self):
+        User.objects.bulk_create([self.user(f"User {i}", consent=i % 2 == 0) for i in range(5)])
+        self.assertRollupMatches()
+
+    def test_bulk_create_ignoring_conflicts(self):
+        existing = self.user("Existing")
+        existing.save()
+        duplicate = self.user("Duplicate", role="researcher")
+        duplicate.user_id = existing.user_id
+        User.objects.bulk_create([duplicate, self.user("New")], ignore_conflicts=True)
+        self.assertRollupMatches()
+
+    def test_constant_update(self):
+        User.objects.bulk_create([self.user(f"User {i}", county=f"County {i % 2}") for i in range(4)])
+        User.objects.filter(county="County 0").update(role="extension_officer", county=None)
+        self.assertRollupMatches()
+
+    def test_expression_update(self):
+        User.objects.bulk_create([self.user(f"User {i}") for i in range(3)])
+        User.objects.filter(name="User 1").update(county=F("name"))
+        self.assertRollupMatches()
+
+    def test_bulk_update(self):
+        users = [self.user(f"User {i}") for i in range(4)]
+        User.objects.bulk_create(users)
+        for i, user in enumerate(users):
+            user.consent = i % 2 == 1
+            user.county = f"County {i}"
+        User.objects.bulk_update(users, ["consent", "county"])
+        self.assertRollupMatches()
+
+    def test_queryset_delete(self):
+        User.objects.bulk_create([self.user(f"User {i}", role="researcher" if i else "farmer") for i in range(4)])
+        User.objects.filter(role="researcher").delete()
+        self.assertRollupMatches()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# List Fast Path
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(PRECOMPRESS_MAX_BYTES=0)
+class FastPathTests(TestCase):
+    """
+    API_FAST_PATH must not change a single byte of any list response,
+    on the first page or one reached through its cursor.
+    """
+    viewsets = {
+        "/api/users/": UserViewSet,
+        "/api/crops/": CropViewSet,
+        "/api/diseases/": CropDiseaseViewSet,
+        "/api/treatments/": DiseaseTreatmentViewSet,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([
+            User(name="Wanjiku", country="Kenya", county="Nakuru", role="farmer", consent=True),
+            User(name="Otieno  ", country="Kenya", county=None, role="researcher", consent=False),
+            User(name="Amina", country="Other", county="", role="extension_officer", consent=True),
+        ])
+        for crop_name in ("Maize", "Beans é", "Kale"):
+            crop = Crop.objects.create(crop_name=crop_name)
+            for disease_name in ("Rust", "Blight"):
+                disease = CropDisease.objects.create(
+                    crop=crop, disease_name=disease_name, symptoms=f"{crop_name} spots", prevention=None,
+                )
+                DiseaseTreatment.objects.create(
+                    disease=disease, crop=crop, drug_name="Mancozeb",
+                    drug_administration_instructions="Spray \"weekly\"",
+                )
+
+    def get(self, path, fast):
+        with override_settings(API_FAST_PATH=fast):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_fast_path_matches_serializers(self):
+        for path, viewset in self.viewsets.items():
+            self.assertIsNotNone(values_spec(viewset.serializer_class), path)
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path, fast=True), self.get(path, fast=False))
+                first = self.get(path + "?page_size=2", fast=True)
+                self.assertEqual(first, self.get(path + "?page_size=2", fast=False))
+                next_page = json.loads(first)["next"]
+                self.assertIsNotNone(next_page)
+                self.assertEqual(self.get(next_page, fast=True), self.get(next_page, fast=False))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Treatment Lookups
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class TreatmentLookupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(crop_name="Maize")
+        cls.blight = CropDisease.objects.create(crop=crop, disease_name="Northern Leaf Blight")
+        DiseaseTreatment.objects.create(
+            disease=cls.blight, crop=crop, drug_name="Mancozeb",
+            drug_administration_instructions="Spray",
+        )
+        DiseaseAlias.objects.create(alias="Turcicum Leaf Blight", disease=cls.blight)
+
+    def test_batch_exact_alias_and_missing(self):
+        response = self.client.get("/api/get-treatments/", {
+            "name": ["northern leaf-blight", "Turcicum Leaf Blight", "Stalk Rot"],
+            "ids": f"{self.blight.pk},999999,abc",
+        })
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+
+        for label in ("northern leaf-blight", "Turcicum Leaf Blight"):
+            self.assertEqual(results[label]["disease_id"], self.blight.pk)
+            self.assertEqual(results[label]["disease_name"], "Northern Leaf Blight")
+            self.assertEqual([t["drug_name"] for t in results[label]["treatments"]], ["Mancozeb"])
+        self.assertEqual(results["Stalk Rot"]["error"], "Disease not found")
+        self.assertEqual(
+            [t["drug_name"] for t in results[str(self.blight.pk)]["treatments"]], ["Mancozeb"]
+        )
+        self.assertEqual(results["999999"], {"error": "Disease not found"})
+        self.assertEqual(results["abc"], {"error": "Invalid disease ID"})
+
+    def test_batch_post_and_limits(self):
+        response = self.client.post(
+            "/api/get-treatments/", {"ids": [self.blight.pk], "names": ["Turcicum Leaf Blight"]},
+            content_type="application/json",
+        )
+        self.assertEqual(set(response.json()), {str(self.blight.pk), "Turcicum Leaf Blight"})
+
+        self.assertEqual(self.client.get("/api/get-treatments/").status_code, 400)
+        response = self.client.post(
+            "/api/get-treatments/", {"ids": "1,2"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        too_many = ",".join(str(i) for i in range(MAX_BATCH_LABELS + 1))
+        response = self.client.get("/api/get-treatments/", {"ids": too_many})
+        self.assertEqual(response.status_code, 400)
+
+    def test_fuzzy_names_get_candidates_not_treatments(self):
+        response = self.client.get("/api/get-treatments/", {"name": "Southern Leaf Blight"})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()["Southern Leaf Blight"]
+        self.assertNotIn("treatments", result)
+        self.assertEqual(result["error"], "Disease not found")
+        self.assertEqual(result["candidates"][0]["disease_id"], self.blight.pk)
+
+        response = self.client.get("/api/get-treatment/", {"name": "Southern Leaf Blight"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("candidates", response.json())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Disease List
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(PRECOMPRESS_MAX_BYTES=0)
+class DiseaseListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(crop_name="Maize")
+        for i in range(5):
+            CropDisease.objects.create(crop=crop, disease_name=f"Disease {i}", symptoms="Spots")
+
+    def test_pages_come_from_the_snapshot(self):
+        expected = json.loads(json.dumps(CropDiseaseSerializer(
+            CropDisease.objects.order_by("pk"), many=True
+        ).data))
+        self.client.get("/api/diseases/")   # builds the snapshot
+
+        pages, url = [], "/api/diseases/?page_size=2"
+        while url:
+            with self.assertNumQueries(0):
+                body = self.client.get(url).json()
+            pages.append(body)
+            url = body["next"]
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        self.assertEqual([row for page in pages for row in page["results"]], expected)
+
+        previous = self.client.get(pages[2]["previous"]).json()
+        self.assertEqual(previous["results"], pages[1]["results"])
+        previous = self.client.get(previous["previous"]).json()
+        self.assertEqual(previous["results"], pages[0]["results"])
+        self.assertIsNone(previous["previous"])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Async Views
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class AsyncViewTests(TestCase):
+    """
+    The async read endpoints (ASYNC_VIEWS) answer exactly as the sync ones.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(crop_name="Maize")
+        blight = CropDisease.objects.create(crop=crop, disease_name="Northern Leaf Blight")
+        DiseaseTreatment.objects.create(
+            disease=blight, crop=crop, drug_name="Mancozeb",
+            drug_administration_instructions="Spray",
+        )
+        User.objects.create(
+            name="Wanjiru", country="Kenya", county="Nakuru", role="farmer", consent=True
+        )
+
+    def assertSameResponse(self, url, view, params=None):
+        sync = self.client.get(url, params or {})
+        request = RequestFactory().get(url, params or {})
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(json.loads(response.content), sync.json())
+
+    def test_treatment_lookup(self):
+        for params in ({"name": "northern leaf blight"}, {"name": "Southern Leaf Blight"}, {}):
+            with self.subTest(params=params):
+                self.assertSameResponse(
+                    "/api/get-treatment/", async_views.get_treatment_by_disease, params
+                )
+
+    def test_user_stats(self):
+        self.assertSameResponse("/api/user-stats/", async_views.user_stats)
+
+    def test_sample_images(self):
+        self.assertSameResponse("/api/sample-images/", async_views.get_sample_images)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog Import
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class CatalogImportTests(TestCase):
+
+    CSV = (
+        "Disease,Symptoms,Prevention,Treatment\n"
+        "Common Rust (Fungal),Pustules,Resistant seed,Spray fungicide\n"
+        "Gray Leaf Spot (Fungal),Lesions,Rotation,\n"
+        "Maize Lethal Necrosis,Yellowing,Clean seed,Rogue plants\n"
+    )
+
+    def run_import(self, csv_text=CSV, strict=True, **kwargs):
+        stats = ImportStats()
+        rows = read_catalog_csv(io.StringIO(csv_text), strict=strict, stats=stats)
+        return import_catalog(rows, stats=stats, **kwargs)
+
+    def catalog(self):
+        return sorted(
+            DiseaseTreatment.objects.values_list("disease__disease_name", "drug_name")
+        ), sorted(CropDisease.objects.values_list("disease_name", flat=True))
+
+    def test_unmapped_names_skipped_unless_opted_in(self):
+        stats = self.run_import()
+        self.assertEqual(stats.skipped, ["Maize Lethal Necrosis"])
+        self.assertEqual(self.catalog()[1], ["Common Rust", "Grey Leaf Spot"])
+
+        self.run_import(strict=False)
+        self.assertIn("Maize Lethal Necrosis", self.catalog()[1])
+
+    def test_dry_run_reports_without_writing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            stats = self.run_import(dry_run=True)
+        self.assertEqual((stats.diseases_created, stats.treatments_created), (2, 1))
+        self.assertFalse(Crop.objects.exists())
+        self.assertFalse(CatalogChange.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_reimport_is_a_no_op(self):
+        self.run_import()
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(5):
+            stats = self.run_import()
+        self.assertFalse(stats.changed)
+        self.assertEqual(callbacks, [])
+
+    def test_prune(self):
+        self.run_import()
+        rust_only = "Disease,Symptoms,Prevention,Treatment\nCommon Rust (Fungal),Pustules,Resistant seed,\n"
+
+        stats = self.run_import(rust_only, prune=False)
+        self.assertEqual(stats.diseases_deleted + stats.treatments_deleted, 0)
+        self.assertEqual(self.catalog()[1], ["Common Rust", "Grey Leaf Spot"])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            stats = self.run_import(rust_only)
+        self.assertEqual((stats.diseases_deleted, stats.treatments_deleted), (1, 1))
+        self.assertEqual(self.catalog(), ([], ["Common Rust"]))
+        # The delete signals and the bulk writes share a single bump.
+        self.assertEqual([c.func for c in callbacks].count(bump_catalog_version), 1)
+        self.assertEqual(
+            set(CatalogChange.objects.filter(action=CatalogChange.DELETE).values_list("model", flat=True)),
+            {"disease", "treatment"},
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Offline Catalog Bundle
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class CatalogBundleTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.folder = os.path.join(media_root, "sample_images")
+        os.mkdir(self.folder)
+        self.add_image("Common Rust.jpg")
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def add_image(self, name):
+        with open(os.path.join(self.folder, name), "wb") as f:
+            f.write(name.encode())
+        # Directory mtimes are coarse; make sure the change is seen.
+        st = os.stat(self.folder)
+        os.utime(self.folder, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_sample_images_are_part_of_the_etag(self):
+        response = self.client.get("/api/catalog/bundle/")
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get("/api/catalog/bundle/", HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        self.add_image("Grey Leaf Spot.jpg")
+        response = self.client.get("/api/catalog/bundle/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            [image["name"] for image in response.json()["sample_images"]],
+            ["Common Rust.jpg", "Grey Leaf Spot.jpg"],
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# User Export
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class UserExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(name="Wanjiru, M.", country="Kenya", county="Nakuru", role="farmer", consent=True),
+            User.objects.create(name="Émile", country="Other", county=None, role="researcher", consent=False),
+            User.objects.create(name="Otieno", country="Kenya", county="Kisumu", role="farmer", consent=True),
+        ]
+
+    def export(self, **params):
+        response = self.client.get("/api/users/export/", params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def expected(self, users):
+        return sorted(
+            ([str(u.user_id), u.name, u.country, u.county, u.role, u.consent] for u in users),
+            key=lambda row: row[1],
+        )
+
+    def test_ndjson(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            sorted((list(r.values()) for r in records), key=lambda row: row[1]),
+            self.expected(self.users),
+        )
+
+    def test_csv_with_filters(self):
+        response, body = self.export(format="csv", country="Kenya", county="nakuru", consent="yes")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="users.csv"', response["Content-Disposition"])
+        header, *rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(header, ["user_id", "name", "country", "county", "role", "consent"])
+        self.assertEqual(rows, [[str(self.users[0].user_id), "Wanjiru, M.", "Kenya", "Nakuru", "farmer", "True"]])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get("/api/users/export/", {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/users/export/", {"consent": "maybe"}).status_code, 400)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Media Serving
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class MediaServingTests(SimpleTestCase):
+
+    DATA = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        media_root = os.path.join(root, "media")
+        os.mkdir(media_root)
+        with open(os.path.join(media_root, "leaf.bin"), "wb") as f:
+            f.write(self.DATA)
+        with open(os.path.join(root, "secret.txt"), "w") as f:
+            f.write("secret")
+        override = override_settings(MEDIA_ROOT=media_root, MEDIA_SERVE_MODE="django")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, **headers):
+        response = self.client.get("/media/leaf.bin", headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_range(self):
+        response, body = self.get(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.DATA[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.DATA)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response, body = self.get(Range="bytes=-5")
+        self.assertEqual((response.status_code, body), (206, self.DATA[-5:]))
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(Range=f"bytes={len(self.DATA)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.DATA)}")
+
+    def test_if_range(self):
+        etag = self.get()[0]["ETag"]
+        response, body = self.get(Range="bytes=0-3", **{"If-Range": etag})
+        self.assertEqual((response.status_code, body), (206, self.DATA[:4]))
+
+        # A stale validator gets the whole (changed) file instead.
+        response, body = self.get(Range="bytes=0-3", **{"If-Range": '"stale"'})
+        self.assertEqual((response.status_code, body), (200, self.DATA))
+
+    def test_revalidation_and_traversal(self):
+        etag = self.get()[0]["ETag"]
+        self.assertEqual(self.get(**{"If-None-Match": etag})[0].status_code, 304)
+        self.assertEqual(self.client.get("/media/%2e%2e/secret.txt").status_code, 404)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Disease Name Resolution
+# ─────────────────────────────────────────────────────────────────────────────
+class DiseaseNameIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = DiseaseNameIndex(
+            [(1, "Fall Army Worm"), (2, "Grey Leaf Spot"), (3, "Northern Leaf Blight")],
+            aliases=[("Turcicum Leaf Blight", 3), ("Orphan", 99)],
+        )
+
+    def test_normalize_name(self):
+        for label in ("Fall armyworm (pest)", "Fall Army-Worm", "  FALL ARMY WORM ", "Fäll Army Worm"):
+            self.assertEqual(normalize_name(label), "fallarmyworm")
+        self.assertEqual(normalize_name("Gray Leaf Spot [v2]"), normalize_name("grey leaf spot"))
+
+    def test_levenshtein(self):
+        def reference(a, b):
+            row = list(range(len(b) + 1))
+            for i, ca in enumerate(a, 1):
+                prev, row[0] = row[0], i
+                for j, cb in enumerate(b, 1):
+                    prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+            return row[-1]
+
+        for a, b in [("", "abc"), ("kitten", "sitting"), ("greyleafspot", "grayleafspots"), ("a" * 70, "b" * 65)]:
+            self.assertEqual(levenshtein(a, b), reference(a, b), (a, b))
+
+    def test_exact_alias_and_fuzzy(self):
+        match = self.index.resolve("Gray Leaf Spot (Fungal)")
+        self.assertEqual((match.disease_id, match.method, match.score), (2, "exact", 1.0))
+        match = self.index.resolve("turcicum leaf blight")
+        self.assertEqual((match.disease_id, match.method, match.disease_name), (3, "alias", "Northern Leaf Blight"))
+        match = self.index.resolve("Fall Armyworn")
+        self.assertEqual((match.disease_id, match.method), (1, "fuzzy"))
+        self.assertGreaterEqual(match.score, MIN_FUZZY_SCORE)
+        self.assertIsNone(self.index.resolve("Orphan"))
+
+    def test_fuzzy_threshold(self):
+        # Close enough to rank, too far to accept.
+        self.assertIsNone(self.index.resolve("Leaf Spot"))
+        candidates = self.index.candidates("Leaf Spot")
+        self.assertEqual(candidates[0].disease_id, 2)
+        self.assertLess(candidates[0].score, MIN_FUZZY_SCORE)
+        self.assertEqual(self.index.candidates("zzz"), [])
+
+        with mock.patch("core.resolver.MIN_FUZZY_SCORE", 0.5):
+            self.assertEqual(DiseaseNameIndex([(2, "Grey Leaf Spot")]).resolve("Leaf Spot").disease_id, 2)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Symptom Search
+# ─────────────────────────────────────────────────────────────────────────────
+class SymptomIndexTests(SimpleTestCase):
+
+    DISEASES = [
+        {"disease_id": 1, "crop": 1, "disease_name": "Grey Leaf Spot",
+         "symptoms": "Rectangular grey lesions between the veins of leaves.",
+         "prevention": "Rotate crops."},
+        {"disease_id": 2, "crop": 1, "disease_name": "Common Rust",
+         "symptoms": "Brown pustules on both leaf surfaces.",
+         "prevention": "Plant resistant hybrids; avoid lesions from hail."},
+        {"disease_id": 3, "crop": 1, "disease_name": "Northern Leaf Blight",
+         "symptoms": "Long cigar-shaped grey-green lesions on the leaf.",
+         "prevention": "Rotate crops and till residue."},
+        {"disease_id": 4, "crop": 2, "disease_name": "Bean Rust",
+         "symptoms": "Rusty pustules on leaves.",
+         "prevention": ""},
+    ]
+
+    def setUp(self):
+        self.index = SymptomIndex(self.DISEASES)
+
+    def ranked(self, query, **kwargs):
+        return [disease["disease_id"] for _, disease, _ in self.index.search(query, **kwargs)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Gray lesions on LEAVES"), ["grey", "lesion", "leaf"])
+
+    def test_ranking(self):
+        # Both terms beat one; the symptom field outweighs prevention.
+        self.assertEqual(self.ranked("rectangular grey lesions"), [1, 3, 2])
+        # Rare terms outweigh ones every disease shares.
+        self.assertEqual(self.ranked("leaf pustules")[:2], [4, 2])
+        # Equal hits: the shorter description ranks first.
+        self.assertEqual(self.ranked("rust"), [4, 2])
+
+    def test_matched_terms_crop_and_limit(self):
+        score, disease, terms = self.index.search("grey lesions", limit=1)[0]
+        self.assertEqual((disease["disease_id"], terms), (1, ["grey", "lesion"]))
+        self.assertEqual(self.ranked("pustules", crop_id=2), [4])
+        self.assertEqual(self.ranked("nothing matches this"), [])
+
+    def test_scores_are_bm25(self):
+        def bm25(query, disease):
+            n = len(self.DISEASES)
+            tfs = []
+            for d in self.DISEASES:
+                tf = Counter()
+                for field, weight in FIELD_WEIGHTS.items():
+                    for term in tokenize(d[field]):
+                        tf[term] += weight
+                tfs.append(tf)
+            avg = sum(sum(tf.values()) for tf in tfs) / n
+            tf = tfs[self.DISEASES.index(disease)]
+            score = 0.0
+            for term in set(tokenize(query)):
+                df = sum(term in t for t in tfs)
+                if not tf[term]:
+                    continue
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                norm = K1 * (1 - B + B * sum(tf.values()) / avg)
+                score += idf * tf[term] * (K1 + 1) / (tf[term] + norm)
+            return score
+
+        for score, disease, _ in self.index.search("grey leaf lesions rust"):
+            self.assertAlmostEqual(score, bm25("grey leaf lesions rust", disease))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Catalog ETags
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(PRECOMPRESS_MAX_BYTES=0)
+class CatalogETagTests(TestCase):
+
+    URLS = (
+        "/api/crops/",
+        "/api/diseases/",
+        "/api/treatments/",
+        "/api/get-treatment/?name=Common%20Rust",
+        "/api/get-treatments/?names=Common%20Rust",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        # Run the fixture's bump, or it would cover the writes under test.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.crop = Crop.objects.create(crop_name="Maize")
+            rust = CropDisease.objects.create(crop=cls.crop, disease_name="Common Rust")
+            DiseaseTreatment.objects.create(
+                disease=rust, crop=cls.crop, drug_name="Mancozeb",
+                drug_administration_instructions="Spray",
+            )
+
+    def test_unchanged_catalog_is_not_modified(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("public", response["Cache-Control"])
+                self.assertIn("Accept", response["Vary"])
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, 304)
+
+    def test_changed_catalog_is_sent_again(self):
+        etags = {url: self.client.get(url)["ETag"] for url in self.URLS}
+        self.assertEqual(len(set(etags.values())), len(self.URLS))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CropDisease.objects.filter(disease_name="Common Rust").update(symptoms="Pustules")
+            self.crop.save()
+
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get("/api/diseases/").json()["results"][0]["symptoms"], "Pustules")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Bulk User Registration
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class BulkRegistrationTests(TestCase):
+
+    ROWS = [
+        {"user_id": "7c0a4c1e-8f3a-4d1e-9f5e-1a2b3c4d5e6f", "name": "Wanjiru",
+         "country": "Kenya", "county": "Nakuru", "role": "farmer", "consent": True},
+        {"name": "Otieno", "country": "Kenya", "role": "researcher", "consent": False},
+    ]
+
+    def post(self, rows):
+        return self.client.post("/api/users/bulk/", rows, content_type="application/json")
+
+    def test_retry_is_idempotent(self):
+        response = self.post(self.ROWS[:1])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(self.ROWS[:1])
+        self.assertFalse([q for q in queries if q["sql"].startswith("INSERT")])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["existing"]), (0, 1))
+        self.assertEqual(body["results"][0]["status"], "exists")
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_invalid_rows_are_reported_not_inserted(self):
+        no_consent = {key: value for key, value in self.ROWS[1].items() if key != "consent"}
+        rows = [self.ROWS[0], no_consent, {**self.ROWS[1], "role": "chief"}, self.ROWS[0]]
+        body = self.post(rows).json()
+
+        self.assertEqual((body["created"], body["failed"]), (1, 3))
+        errors = {result["index"]: result.get("errors") for result in body["results"]}
+        self.assertIn("consent", errors[1])
+        self.assertIn("role", errors[2])
+        self.assertIn("user_id", errors[3])
+        self.assertEqual(list(User.objects.values_list("name", flat=True)), ["Wanjiru"])
+
+    def test_csv_upload(self):
+        upload = io.BytesIO(
+            b"name,country,county,role,consent\n"
+            b"Achieng,Kenya,,farmer,true\n"
+            b"Kamau,Kenya,Nyeri,farmer,\n"
+        )
+        upload.name = "users.csv"
+        body = self.client.post("/api/users/bulk/", {"file": upload}).json()
+        self.assertEqual((body["created"], body["failed"]), (1, 1))
+        self.assertIn("consent", body["results"][1]["errors"])
+        self.assertIsNone(User.objects.get(name="Achieng").county)
+
+    def test_limits(self):
+        self.assertEqual(self.post({"users": "nope"}).status_code, 400)
+        with mock.patch("core.views.BULK_USERS_MAX", 1):
+            self.assertEqual(self.post(self.ROWS).status_code, 400)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backfills
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class BackfillTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        crop = Crop.objects.create(crop_name="Maize")
+        cls.diseases = [
+            CropDisease.objects.create(crop=crop, disease_name=f"Disease {i}", symptoms=f"  Spots {i} ")
+            for i in range(5)
+        ]
+
+    def test_resumes_from_checkpoint(self):
+        job = BACKFILLS["normalize_disease_text"]()
+        seen, fail_at = [], self.diseases[3].pk
+
+        def transform(disease):
+            if disease.pk == fail_at:
+                raise RuntimeError("worker killed")
+            seen.append(disease.pk)
+            return job.transform(disease)
+
+        flaky = dataclasses.replace(job, transform=transform)
+        with mock.patch.dict(BACKFILLS, {"normalize_disease_text": lambda: flaky}):
+            with self.assertRaises(RuntimeError):
+                call_command("backfill", "normalize_disease_text", batch_size=2, stdout=io.StringIO())
+
+            # The first batch committed with its checkpoint; the second rolled back.
+            checkpoint = BackfillCheckpoint.objects.get(name="normalize_disease_text")
+            self.assertEqual(checkpoint.last_pk, str(self.diseases[1].pk))
+            self.assertEqual((checkpoint.processed, checkpoint.completed_at), (2, None))
+            self.assertEqual(
+                list(CropDisease.objects.order_by("pk").values_list("symptoms", flat=True)),
+                ["Spots 0", "Spots 1", "  Spots 2 ", "  Spots 3 ", "  Spots 4 "],
+            )
+
+            fail_at, seen[:] = None, []
+            call_command("backfill", "normalize_disease_text", batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(seen, [d.pk for d in self.diseases[2:]])
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.processed, checkpoint.updated), (5, 5))
+        self.assertIsNotNone(checkpoint.completed_at)
+        self.assertEqual(
+            list(CropDisease.objects.order_by("pk").values_list("symptoms", flat=True)),
+            [f"Spots {i}" for i in range(5)],
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Crop Tree
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+@override_settings(PRECOMPRESS_MAX_BYTES=0)
+class CropTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crop = Crop.objects.create(crop_name="Maize", description="Cereal")
+        for i in range(3):
+            disease = CropDisease.objects.create(crop=cls.crop, disease_name=f"Disease {i}", symptoms="Spots")
+            for j in range(2):
+                DiseaseTreatment.objects.create(
+                    disease=disease, crop=cls.crop, drug_name=f"Drug {i}.{j}",
+                    drug_administration_instructions="Spray",
+                )
+
+    def full(self, **params):
+        return self.client.get(f"/api/crops/{self.crop.pk}/full/", params)
+
+    def test_one_query_per_level(self):
+        with self.assertNumQueries(3):
+            body = self.full().json()
+        self.assertEqual(body["crop_name"], "Maize")
+        self.assertEqual([len(d["treatments"]) for d in body["diseases"]], [2, 2, 2])
+        self.assertEqual(
+            set(body["diseases"][0]["treatments"][0]),
+            {"drug_id", "drug_name", "drug_administration_instructions"},
+        )
+
+    def test_sparse_fields(self):
+        with self.assertNumQueries(3):
+            body = self.full(fields="crop_name,diseases.disease_name,diseases.treatments.drug_name").json()
+        self.assertEqual(set(body), {"crop_name", "diseases"})
+        self.assertEqual(body["diseases"][0], {
+            "disease_name": "Disease 0",
+            "treatments": [{"drug_name": "Drug 0.0"}, {"drug_name": "Drug 0.1"}],
+        })
+
+        # Unselected relations are not queried at all.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.full(fields="crop_name").json(), {"crop_name": "Maize"})
+        with self.assertNumQueries(2):
+            body = self.full(fields="diseases.symptoms").json()
+        self.assertEqual(body, {"diseases": [{"symptoms": "Spots"}] * 3})
+
+    def test_bad_fields(self):
+        for fields in ("colour", "diseases.colour", "crop_name.length", "diseases.treatments.dose"):
+            with self.subTest(fields=fields):
+                response = self.full(fields=fields)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(fields.split(".")[-1], response.json()["error"])
+        self.assertEqual(self.client.get("/api/crops/999999/full/").status_code, 404)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class MetricsEndpointTests(SimpleTestCase):
+
+    def scrape(self, authorization=None):
+        headers = {"Authorization": authorization} if authorization else {}
+        return self.client.get("/api/metrics", headers=headers)
+
+    def test_requires_token(self):
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.scrape().status_code, 404)
+            self.assertEqual(self.scrape("Bearer ").status_code, 404)
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.scrape().status_code, 404)
+            self.assertEqual(self.scrape("Bearer wrong").status_code, 404)
+            self.assertEqual(self.scrape("Basic s3cret").status_code, 404)
+
+            response = self.scrape("Bearer s3cret")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Bench
+# ─────────────────────────────────────────────────────────────────────────────
+@isolated_caches
+class BenchGuardTests(TestCase):
+
+    def bench(self, *args):
+        call_command("bench", *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_refuses_other_databases_without_force(self):
+        self.assertTrue(is_bench_database(connection))
+        with mock.patch.dict(connection.settings_dict, NAME="/srv/cropdoc/db.sqlite3"):
+            self.assertFalse(is_bench_database(connection))
+            with override_settings(DEBUG=True), self.assertRaisesMessage(CommandError, "--force"):
+                self.bench("--clear")
+
+            with override_settings(BENCH_DATABASE="/srv/cropdoc/db.sqlite3"):
+                self.bench("--clear")
+            self.bench("--clear", "--force")
+
+        with mock.patch.dict(connection.settings_dict, NAME="/srv/cropdoc/test_cropdoc.sqlite3"):
+            self.assertTrue(is_bench_database(connection))
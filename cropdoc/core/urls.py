@@ -1,7 +1,18 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import *
-from django.conf.urls.static import static
+from .media import media_urlpatterns
+from .metrics import metrics_view
+from .profiling import debug_request
+
+# ASGI deployments serve these read endpoints from async views.
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        get_sample_images,
+        get_treatment_by_disease,
+        user_stats,
+    )
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -10,9 +21,18 @@ router.register(r'diseases', CropDiseaseViewSet)
 router.register(r'treatments', DiseaseTreatmentViewSet)
 
 urlpatterns = [
+    # Must precede the router, which would treat "export" as a user pk.
+    path('users/export/', export_users),
     path('', include(router.urls)),
     path('get-treatment/', get_treatment_by_disease),
-    path('diseases/', get_all_diseases, name='all-diseases'),
+    path('get-treatments/', get_treatments_batch),
+    path('resolve-disease/', resolve_disease_name),
+    path('search-symptoms/', search_symptoms),
+    path('catalog/bundle/', catalog_bundle),
+    path('catalog/delta/', catalog_delta),
     path('user-stats/', user_stats),
+    path('diagnosis-events/', ingest_diagnosis_events),
     path('sample-images/', get_sample_images),
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metrics_view),
+    path('debug/requests/<str:debug_id>/', debug_request),
+]+ media_urlpatterns()
@@ -1,25 +1,50 @@
 # core/views.py
 
 # ─── Standard Library Imports ────────────────────────────────────────────────
+import csv
+import hashlib
+import io
 import os
+from collections import Counter
+from urllib.parse import quote
 
 # ─── Django Imports ───────────────────────────────────────────────────────────
 from django.conf import settings
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_GET
 
 # ─── DRF Imports ──────────────────────────────────────────────────────────────
 from rest_framework import viewsets
-from rest_framework.decorators import api_view, parser_classes
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
 
 # ─── Local Imports ────────────────────────────────────────────────────────────
-from .models import User, Crop, CropDisease, DiseaseTreatment
+from .caching import CatalogCacheMixin, catalog_cached
+from .catalog import get_catalog
+from .fastpath import ValuesListMixin
+from .events import get_event_buffer
+from .exports import EXPORT_FORMATS, filter_users, parse_consent, stream_users
+from .images import get_image_manifest
+from .metrics import inc
+from .pagination import SortedRows
+from .sync import build_delta, get_bundle
+from .models import User, UserStat, Crop, CropDisease, DiseaseTreatment, DiagnosisEvent
 from .serializers import (
+    BulkUserSerializer,
     UserSerializer,
     CropSerializer,
     CropDiseaseSerializer,
+    CropTreeSerializer,
+    DiagnosisEventSerializer,
     DiseaseTreatmentSerializer,
+    parse_fields,
 )
 
 
@@ -27,52 +52,290 @@ from .serializers import (
 # ─────────────────────────────────────────────────────────────────────────────
 # Utility Function: Get Treatments for a Disease
 # ─────────────────────────────────────────────────────────────────────────────
-def get_treatments_for_disease(disease_id=None, disease_name=None):
+def get_treatments_for_disease(disease_id=None, disease_name=None, catalog=None):
     """
     Retrieve treatment recommendations for a given disease.
     Accepts either `disease_id` or `disease_name`.
+    Lookups are served from the in-memory catalog snapshot.
+
+    Names must match a disease or alias exactly (case and spacing aside):
+    a close name can be a different disease, so instead of its treatments
+    the error payload lists the closest candidates, to be confirmed via
+    `/api/resolve-disease/`. Returns (treatments, None) or (None, error
+    payload).
     """
+    catalog = catalog or get_catalog()
+
     if disease_id:
-        treatments = DiseaseTreatment.objects.filter(disease_id=disease_id)
-    elif disease_name:
         try:
-            disease = CropDisease.objects.get(disease_name__iexact=disease_name)
-            treatments = DiseaseTreatment.objects.filter(disease=disease)
-        except CropDisease.DoesNotExist:
-            return None, "Disease not found"
+            disease_id = int(disease_id)
+        except (TypeError, ValueError):
+            return None, {"error": "Invalid disease ID"}
+    elif disease_name:
+        disease_id = catalog.find_disease_id(disease_name)
+        if disease_id is None:
+            return None, {
+                "error": "Disease not found",
+                "candidates": [m.as_dict() for m in catalog.name_index.candidates(disease_name)],
+            }
     else:
-        return None, "Provide disease ID or name"
+        return None, {"error": "Provide disease ID or name"}
+
+    return catalog.treatments_for(disease_id), None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Utility Function: Get Treatments for Several Diseases
+# ─────────────────────────────────────────────────────────────────────────────
+MAX_BATCH_LABELS = 100
+
+
+def get_treatments_for_diseases(disease_ids=(), disease_names=()):
+    """
+    Batch variant of `get_treatments_for_disease`.
+    Returns a dict keyed by each requested id/name (as given), holding
+    either the treatments for that disease or a per-item error. As in the
+    single lookup, names must match a disease or alias exactly; a miss
+    lists the closest candidates instead of guessing.
+    """
+    catalog = get_catalog()
+    results = {}
+
+    for label in disease_ids:
+        try:
+            disease_id = int(label)
+        except (TypeError, ValueError):
+            results[str(label)] = {"error": "Invalid disease ID"}
+            continue
+        if disease_id not in catalog.diseases_by_id:
+            results[str(label)] = {"error": "Disease not found"}
+            continue
+        results[str(label)] = {
+            "disease_id": disease_id,
+            "treatments": catalog.treatments_for(disease_id),
+        }
 
-    serializer = DiseaseTreatmentSerializer(treatments, many=True)
-    return serializer.data, None
+    for label in disease_names:
+        disease_id = catalog.find_disease_id(label)
+        if disease_id is None:
+            results[label] = {
+                "error": "Disease not found",
+                "candidates": [m.as_dict() for m in catalog.name_index.candidates(label)],
+            }
+            continue
+        results[label] = {
+            "disease_id": disease_id,
+            "disease_name": catalog.diseases_by_id[disease_id]["disease_name"],
+            "treatments": catalog.treatments_for(disease_id),
+        }
+
+    return results
+
+
+def _split_labels(values, split_commas=True):
+    """
+    Accept repeated parameters (`?name=a&name=b`), comma-separated values
+    (`?names=a,b`) or JSON lists, and return a flat list without blanks.
+    JSON list items are taken whole (`split_commas=False`): a name may
+    contain a comma.
+    """
+    labels = []
+    for value in values:
+        parts = value.split(",") if split_commas and isinstance(value, str) else [value]
+        for part in parts:
+            part = str(part).strip() if part is not None else ""
+            if part:
+                labels.append(part)
+    return labels
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ViewSets (CRUD Endpoints)
 # ─────────────────────────────────────────────────────────────────────────────
-class UserViewSet(viewsets.ModelViewSet):
+BULK_USERS_MAX = 5000
+BULK_USERS_CHUNK_SIZE = 500
+
+
+def _read_bulk_rows(request):
+    """
+    Rows for bulk registration: a JSON list (or {"users": [...]}), or a
+    CSV upload in the `file` field with a header row.
+    """
+    upload = request.FILES.get("file")
+    if upload is not None:
+        text = io.TextIOWrapper(upload.file, encoding="utf-8-sig")
+        # Empty CSV cells mean "not provided", not empty strings.
+        return [
+            {key: value for key, value in row.items() if key and value not in ("", None)}
+            for row in csv.DictReader(text)
+        ]
+    data = request.data
+    if isinstance(data, dict):
+        data = data.get("users")
+    return data if isinstance(data, list) else None
+
+
+class UserViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[JSONParser, MultiPartParser, FormParser],
+    )
+    def bulk_register(self, request):
+        """
+        Register many users in one request (JSON list or CSV `file`).
+        Valid rows are inserted with chunked `bulk_create` in a single
+        transaction; invalid rows are reported per index. Rows whose
+        client-supplied `user_id` already exists are skipped, so a retry
+        of the same upload creates nothing twice.
+        """
+        rows = _read_bulk_rows(request)
+        if rows is None:
+            return Response(
+                {"error": "Send a JSON list of users or a CSV `file`"}, status=400
+            )
+        if len(rows) > BULK_USERS_MAX:
+            return Response(
+                {"error": f"At most {BULK_USERS_MAX} users per request"}, status=400
+            )
+
+        results, pending, seen_ids = [], [], set()
+        for index, row in enumerate(rows):
+            serializer = BulkUserSerializer(data=row)
+            if not serializer.is_valid():
+                results.append({"index": index, "status": "error", "errors": serializer.errors})
+                continue
+            user = User(**serializer.validated_data)
+            if user.user_id in seen_ids:
+                results.append({
+                    "index": index,
+                    "status": "error",
+                    "errors": {"user_id": ["Duplicate user_id in this request."]},
+                })
+                continue
+            seen_ids.add(user.user_id)
+            result = {"index": index, "user_id": str(user.user_id), "status": "created"}
+            results.append(result)
+            pending.append((user, result))
+
+        existing = set(
+            User.objects.filter(pk__in=seen_ids).values_list("pk", flat=True)
+        ) if seen_ids else set()
+        new_users = []
+        for user, result in pending:
+            if user.user_id in existing:
+                result["status"] = "exists"
+            else:
+                new_users.append(user)
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(new_users, batch_size=BULK_USERS_CHUNK_SIZE)
+        except IntegrityError:
+            # A concurrent upload inserted one of these ids; retrying is safe.
+            return Response(
+                {"error": "Some users were registered concurrently, retry the request"},
+                status=409,
+            )
+
+        summary = Counter(result["status"] for result in results)
+        return Response(
+            {
+                "created": summary["created"],
+                "existing": summary["exists"],
+                "failed": summary["error"],
+                "results": results,
+            },
+            status=201 if summary["created"] else 200,
+        )
+
+
+def _tree_queryset(serializer_class, queryset, tree, fk=None):
+    """
+    `queryset` loading only the columns `tree` selects for
+    `serializer_class`, with one Prefetch (itself built this way) per
+    selected nested relation. `fk` is the column the parent prefetch
+    joins on.
+    """
+    columns, relations = serializer_class.columns(tree)
+    if fk:
+        columns.add(fk)
+    prefetches = []
+    for name, subtree in relations.items():
+        relation = queryset.model._meta.get_field(name)
+        child_class = type(serializer_class().fields[name].child)
+        prefetches.append(Prefetch(name, queryset=_tree_queryset(
+            child_class,
+            relation.related_model.objects.order_by("pk"),
+            subtree,
+            fk=relation.field.name,
+        )))
+    return queryset.only(*columns).prefetch_related(*prefetches)
+
 
-class CropViewSet(viewsets.ModelViewSet):
+class CropViewSet(CatalogCacheMixin, ValuesListMixin, viewsets.ModelViewSet):
+    precompress = True
+    precompress_params = CatalogCacheMixin.precompress_params + ("fields",)
     queryset = Crop.objects.all()
     serializer_class = CropSerializer
 
+    @action(detail=True, methods=["get"], url_path="full")
+    def full(self, request, pk=None):
+        """
+        The crop with its diseases and each disease's treatments, in one
+        query per level. `?fields=crop_name,diseases.disease_name,
+        diseases.treatments.drug_name` keeps only the named fields (a
+        relation named alone keeps all of its fields); unselected columns
+        are not loaded and unselected relations not queried.
+        """
+        tree = parse_fields(request.GET["fields"]) if request.GET.get("fields") else None
+        if tree is not None:
+            try:
+                CropTreeSerializer.check_fields(tree)
+            except ValueError as exc:
+                return Response({"error": str(exc)}, status=400)
+
+        crop = get_object_or_404(_tree_queryset(CropTreeSerializer, Crop.objects.all(), tree), pk=pk)
+        return Response(CropTreeSerializer(crop, fields=tree).data)
+
 
-class CropDiseaseViewSet(viewsets.ModelViewSet):
+class CropDiseaseViewSet(CatalogCacheMixin, ValuesListMixin, viewsets.ModelViewSet):
+    precompress = True
     queryset = CropDisease.objects.all()
     serializer_class = CropDiseaseSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Served from the catalog snapshot, which holds every disease
+        already serialized in id order: pages cost no query.
+        """
+        rows = SortedRows(CropDisease, get_catalog().diseases)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(list(rows))
+        return self.get_paginated_response(page)
 
-class DiseaseTreatmentViewSet(viewsets.ModelViewSet):
+
+class DiseaseTreatmentViewSet(CatalogCacheMixin, ValuesListMixin, viewsets.ModelViewSet):
+    precompress = True
     queryset = DiseaseTreatment.objects.all()
     serializer_class = DiseaseTreatmentSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = self.get_serializer_class().setup_eager_loading(queryset)
+        return queryset
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # API: Get Treatment by Disease
 # ─────────────────────────────────────────────────────────────────────────────
+@catalog_cached
 @api_view(["GET"])
 def get_treatment_by_disease(request):
     """
@@ -84,75 +347,344 @@ def get_treatment_by_disease(request):
 
     data, error = get_treatments_for_disease(disease_id, disease_name)
     if error:
-        return Response({"error": error}, status=400)
+        return Response(error, status=400)
 
     return Response(data)
 
 # ─────────────────────────────────────────────────────────────────────────────
-# API: Get All Diseases
+# API: Get Treatments for Several Diseases
+# ─────────────────────────────────────────────────────────────────────────────
+@catalog_cached
+@api_view(["GET", "POST"])
+def get_treatments_batch(request):
+    """
+    Retrieve treatments for several diseases in one request.
+    GET:  ?id=1&id=2&name=Common Rust  (or comma-separated `ids`/`names`)
+    POST: {"ids": [1, 2], "names": ["Common Rust", "Fall Army Worm"]}
+    """
+    if request.method == "POST":
+        if not isinstance(request.data, dict):
+            return Response(
+                {"error": "Send a JSON object with `ids` and/or `names`"}, status=400
+            )
+        ids = request.data.get("ids") or []
+        names = request.data.get("names") or []
+        if not isinstance(ids, list) or not isinstance(names, list):
+            return Response({"error": "`ids` and `names` must be lists"}, status=400)
+        ids, names = _split_labels(ids, split_commas=False), _split_labels(names, split_commas=False)
+    else:
+        ids = _split_labels(request.GET.getlist("id") + request.GET.getlist("ids"))
+        names = _split_labels(request.GET.getlist("name") + request.GET.getlist("names"))
+
+    if not ids and not names:
+        return Response({"error": "Provide disease IDs or names"}, status=400)
+    if len(ids) + len(names) > MAX_BATCH_LABELS:
+        return Response(
+            {"error": f"At most {MAX_BATCH_LABELS} diseases per request"},
+            status=400,
+        )
+
+    return Response(get_treatments_for_diseases(ids, names))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Resolve Disease Name
+# ─────────────────────────────────────────────────────────────────────────────
+@catalog_cached
+@api_view(["GET"])
+def resolve_disease_name(request):
+    """
+    Resolve a free-text or classifier label to a disease.
+    Returns the best match (or null) with the candidate that matched, its
+    score and method (`exact`, `alias` or `fuzzy`), plus the top candidates.
+    """
+    name = request.GET.get("name", "").strip()
+    if not name:
+        return Response({"error": "Provide disease name"}, status=400)
+
+    catalog = get_catalog()
+    match = catalog.resolve_disease(name)
+    return Response({
+        "query": name,
+        "match": match.as_dict() if match else None,
+        "candidates": [m.as_dict() for m in catalog.name_index.candidates(name)],
+    })
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Search Diseases by Symptoms
 # ─────────────────────────────────────────────────────────────────────────────
+@catalog_cached
 @api_view(["GET"])
-def get_all_diseases(request):
+def search_symptoms(request):
     """
-    Retrieve a list of all CropDisease objects with their ID, name, 
-    characteristics, and associated crop name.
+    Rank diseases for observed symptoms, e.g.
+    `?q=rectangular grey lesions between veins&crop=Maize&limit=5`.
+    Scored with BM25 over the precomputed in-memory symptom index.
     """
-    # Use select_related to fetch the Crop object in the same query 
-    # to avoid the N+1 query problem.
-    diseases = CropDisease.objects.select_related('crop').all()
-    
-    # We will use the existing CropDiseaseSerializer, which should include all fields.
-    serializer = CropDiseaseSerializer(diseases, many=True)
-    
-    return Response(serializer.data)
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return Response({"error": "Provide symptoms to search for (`q`)"}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", 10)), 1), 50)
+    except ValueError:
+        return Response({"error": "Invalid limit"}, status=400)
+
+    catalog = get_catalog()
+    crop_id = None
+    if request.GET.get("crop"):
+        crop_id = catalog.find_crop_id(request.GET["crop"])
+        if crop_id is None:
+            return Response({"error": "Crop not found"}, status=400)
+
+    results = [
+        {
+            "disease_id": disease["disease_id"],
+            "disease_name": disease["disease_name"],
+            "crop": disease["crop"],
+            "score": round(score, 4),
+            "matched_terms": terms,
+        }
+        for score, disease, terms in catalog.symptom_index.search(query, crop_id, limit)
+    ]
+    return Response({"query": query, "results": results})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Offline Catalog Bundle
+# ─────────────────────────────────────────────────────────────────────────────
+def _accepts_gzip(request):
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+
+@condition(etag_func=lambda request: get_bundle().etag)
+@require_GET
+def catalog_bundle(request):
+    """
+    Full catalog for offline use: crops, diseases, treatments and the
+    sample image manifest, plus the sync `version` to pass to the delta
+    endpoint. Built and gzip-compressed once per catalog change.
+    """
+    bundle = get_bundle()
+    if _accepts_gzip(request):
+        response = HttpResponse(bundle.gzip, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(bundle.identity, content_type="application/json")
+    patch_vary_headers(response, ("Accept-Encoding",))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Offline Catalog Delta
+# ─────────────────────────────────────────────────────────────────────────────
+@api_view(["GET"])
+def catalog_delta(request):
+    """
+    Rows changed since the client's sync version (`?since=`): current
+    values for new/updated rows and ids under `deleted` for removed ones.
+    Responds 410 when the change log no longer reaches back that far and
+    the client must download the full bundle again.
+    """
+    try:
+        since = int(request.GET.get("since", ""))
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return Response({"error": "Provide sync version `since`"}, status=400)
+
+    delta = build_delta(since)
+    if delta is None:
+        return Response({"error": "Sync version too old, fetch the full bundle"}, status=410)
+    return Response(delta)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # API: User Statistics
 # ─────────────────────────────────────────────────────────────────────────────
+USER_STATS_COLUMNS = ("country", "county", "role", "consent", "total")
+
+
+def summarize_user_stats(rows):
+    """
+    Fold UserStat (country, county, role, consent, total) rows into the
+    `user_stats` payload.
+    """
+    by_country, by_county, by_role, by_consent = Counter(), Counter(), Counter(), Counter()
+    for country, county, role, consent, total in rows:
+        by_country[country] += total
+        if county:
+            by_county[county] += total
+        by_role[role] += total
+        by_consent[consent] += total
+
+    def as_list(counts, field):
+        return [{field: key, "total": total} for key, total in sorted(counts.items())]
+
+    return {
+        "by_country": as_list(by_country, "country"),
+        "by_county": as_list(by_county, "county"),
+        "by_role": as_list(by_role, "role"),
+        "by_consent": as_list(by_consent, "consent"),
+    }
+
+
 @api_view(["GET"])
 def user_stats(request):
     """
-    Returns counts of users grouped by country and county.
+    Returns counts of users grouped by country, county, role and consent.
+    Read from the `UserStat` rollup rather than scanning the User table.
+    """
+    rows = UserStat.objects.filter(total__gt=0).values_list(*USER_STATS_COLUMNS)
+    return Response(summarize_user_stats(rows))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Diagnosis Events
+# ─────────────────────────────────────────────────────────────────────────────
+DIAGNOSIS_EVENTS_MAX = 1000
+
+
+@api_view(["POST"])
+def ingest_diagnosis_events(request):
+    """
+    Record one diagnosis event (a JSON object) or a batch (a JSON list, or
+    {"events": [...]}). Valid events are queued for the write-behind
+    buffer (core/events.py) and answered with 202; invalid ones are
+    reported per index. Clients should send an `event_id` and re-send on
+    failure: an event is stored once however often it arrives.
     """
-    by_country = User.objects.values("country").annotate(total=Count("id"))
-    by_county = (
-        User.objects.values("county")
-        .annotate(total=Count("id"))
-        .exclude(county=None)
+    data = request.data
+    if isinstance(data, dict) and "events" in data:
+        data = data["events"]
+    rows = [data] if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        return Response({"error": "Send an event object or a list of events"}, status=400)
+    if len(rows) > DIAGNOSIS_EVENTS_MAX:
+        return Response(
+            {"error": f"At most {DIAGNOSIS_EVENTS_MAX} events per request"}, status=400
+        )
+
+    # One serializer for every row: building its fields is most of the
+    # cost of validating an event.
+    serializer = DiagnosisEventSerializer()
+    events, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            events.append(DiagnosisEvent(**serializer.run_validation(row)))
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": exc.detail})
+
+    if events and not get_event_buffer().add(events):
+        inc("cropdoc_events_rejected_total", {}, len(events))
+        return Response(
+            {"error": "Too many events pending, retry shortly"},
+            status=503,
+            headers={"Retry-After": "1"},
+        )
+    return Response(
+        {"accepted": len(events), "failed": len(errors), "errors": errors},
+        status=202 if events else 400,
     )
 
-    return Response({
-        "by_country": by_country,
-        "by_county": by_county,
-    })
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API: Export Users
+# ─────────────────────────────────────────────────────────────────────────────
+@require_GET
+def export_users(request):
+    """
+    Stream all users as NDJSON (default) or CSV.
+    Supports `format`, `country`, `county`, `role` and `consent` filters.
+
+    This is a plain Django view rather than an `@api_view`, because DRF
+    would treat `?format=` as a renderer override.
+    """
+    export_format = request.GET.get("format", "ndjson").lower()
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"},
+            status=400,
+        )
+    try:
+        consent = parse_consent(request.GET.get("consent"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    queryset = filter_users(
+        country=request.GET.get("country"),
+        county=request.GET.get("county"),
+        role=request.GET.get("role"),
+        consent=consent,
+    )
+
+    response = StreamingHttpResponse(
+        stream_users(queryset, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="users.{export_format}"'
+    return response
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # API: Get Sample Images
 # ─────────────────────────────────────────────────────────────────────────────
-from urllib.parse import quote
+SAMPLE_IMAGES_FOLDER = os.path.join(settings.MEDIA_ROOT, "sample_images")
 
+
+def _sample_images_prefix(request):
+    return request.build_absolute_uri(settings.MEDIA_URL + "sample_images/")
+
+
+def _sample_images_manifest(request):
+    # Async views load the manifest off the event loop beforehand.
+    if hasattr(request, "_sample_images_manifest"):
+        return request._sample_images_manifest
+    return get_image_manifest(SAMPLE_IMAGES_FOLDER)
+
+
+def _sample_images_etag(request):
+    manifest = _sample_images_manifest(request)
+    if manifest is None:
+        return None
+    # URLs are absolute, so the host is part of the representation.
+    prefix = hashlib.sha256(_sample_images_prefix(request).encode()).hexdigest()[:8]
+    return f"{manifest.etag}-{prefix}"
+
+
+def _sample_images_last_modified(request):
+    manifest = _sample_images_manifest(request)
+    return manifest.last_modified if manifest else None
+
+
+def _sample_images_payload(request, manifest):
+    if manifest is None:
+        return {"images": []}
+    media_url_prefix = _sample_images_prefix(request)
+    return {
+        "images": [
+            {**image, "url": media_url_prefix + quote(image["name"])}
+            for image in manifest.images
+        ]
+    }
+
+
+@condition(etag_func=_sample_images_etag, last_modified_func=_sample_images_last_modified)
 @api_view(["GET"])
 def get_sample_images(request):
     """
     Returns a list of sample images from `media/sample_images/`.
-    Each entry contains the image name and its encoded URL.
+    Each entry contains the image name, its encoded URL, size in bytes,
+    dimensions and SHA-256 content hash.
+
+    The manifest is cached until the folder changes, and the response
+    carries ETag/Last-Modified so clients can revalidate with a 304.
     """
-    sample_folder = os.path.join(settings.MEDIA_ROOT, "sample_images")
-    if not os.path.exists(sample_folder):
+    manifest = get_image_manifest(SAMPLE_IMAGES_FOLDER)
+    if manifest is None:
         return Response({"images": []})
 
-    media_url_prefix = request.build_absolute_uri(settings.MEDIA_URL + "sample_images/")
-
-    images = []
-    for file_name in os.listdir(sample_folder):
-        if file_name.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-            encoded_name = quote(file_name)
-            images.append({
-                "name": file_name,
-                "url": media_url_prefix + encoded_name,
-            })
-
-    return Response({"images": images})
-
+    response = Response(_sample_images_payload(request, manifest))
+    patch_cache_control(response, no_cache=True)
+    return response
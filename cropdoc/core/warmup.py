@@ -0,0 +1,103 @@
+# core/warmup.py
+#
+# Startup work that would otherwise land on the first requests of every
+# worker. gunicorn.conf.py runs `warm_up` in the master when preloading,
+# so forked workers inherit the result copy-on-write, and
+# `check_connections` in each worker before it accepts traffic.
+
+# ─── Standard Library Imports ────────────────────────────────────────────────
+import time
+
+# ─── Django Imports ───────────────────────────────────────────────────────────
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+# ─── DRF Imports ──────────────────────────────────────────────────────────────
+from rest_framework.renderers import JSONRenderer
+
+
+def _timed(timings, name, func):
+    started = time.perf_counter()
+    result = func()
+    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _load_routes():
+    # Imports core.urls (and with it core.views) and compiles every
+    # pattern while populating the reverse lookup tables.
+    get_resolver().reverse_dict
+
+
+def _load_serializers():
+    from . import serializers
+
+    for name in dir(serializers):
+        serializer_class = getattr(serializers, name)
+        if isinstance(serializer_class, type) and issubclass(
+            serializer_class, serializers.serializers.ModelSerializer
+        ) and serializer_class is not serializers.serializers.ModelSerializer:
+            # Builds the fields, which fills the model _meta caches.
+            serializer_class().fields
+    JSONRenderer().render({"warm": [1, 2.0, None]})
+
+
+def _load_catalog():
+    from .catalog import get_catalog
+
+    catalog = get_catalog()
+    # First-use paths of the resolver and search indexes.
+    catalog.name_index.candidates("warm up")
+    catalog.symptom_index.search("warm up")
+
+
+def _load_sample_images():
+    from .images import get_image_manifest
+    from .views import SAMPLE_IMAGES_FOLDER
+
+    get_image_manifest(SAMPLE_IMAGES_FOLDER)
+
+
+def _load_bundle():
+    from .sync import get_bundle
+
+    get_bundle()
+
+
+def warm_up(catalog=True):
+    """
+    Import and compile routes and serializers and, with `catalog`, build
+    the catalog snapshot, sample-image manifest and offline bundle.
+    Database connections are closed afterwards, so a master can fork
+    without sharing sockets with its workers. Returns {step: ms}.
+    """
+    timings = {}
+    try:
+        _timed(timings, "routes", _load_routes)
+        _timed(timings, "serializers", _load_serializers)
+        if catalog:
+            _timed(timings, "catalog", _load_catalog)
+            _timed(timings, "sample_images", _load_sample_images)
+            _timed(timings, "bundle", _load_bundle)
+    finally:
+        connections.close_all()
+    return timings
+
+
+def check_connections():
+    """
+    Open every configured database connection in this process and run a
+    trivial query on it. With CONN_MAX_AGE the connection stays open for
+    the first request. Returns {alias: error message or None}.
+    """
+    results = {}
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            results[connection.alias] = None
+        except DatabaseError as exc:
+            connection.close()
+            results[connection.alias] = str(exc)
+    return results
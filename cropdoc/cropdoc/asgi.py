@@ -3,6 +3,22 @@ ASGI config for cropdoc project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI switches the read endpoints (get-treatment, diseases,
+user-stats, sample-images) to the async views in core/async_views.py
+(ASYNC_VIEWS, on by default here), so a slow client holds a coroutine
+instead of a worker thread. Run it with uvicorn:
+
+    uvicorn cropdoc.asgi:application --host 0.0.0.0 --port 8000
+
+or under gunicorn, keeping its process management:
+
+    gunicorn cropdoc.asgi:application -k uvicorn_worker.UvicornWorker -w 4 -b 0.0.0.0:8000
+
+Database queries from async views still run in a thread pool (Django's
+ORM is sync underneath). Persistent connections are per thread, so
+DB_CONN_MAX_AGE defaults to 0 here; put a pooler such as PgBouncer in
+front of the database instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +28,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cropdoc.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
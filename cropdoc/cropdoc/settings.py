@@ -48,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',  # first, so timings cover the whole stack
+    'core.profiling.ServerTimingMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,12 +97,37 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 load_dotenv(os.path.join(BASE_DIR, '.env')) 
 
+# Persistent connections, re-checked before reuse after each request, so
+# workers (see gunicorn.conf.py) do not reconnect on every request.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
 DATABASES = {
     "default": dj_database_url.config(
-        default=os.environ.get("DATABASE_URL", "dblink") 
+        default=os.environ.get("DATABASE_URL", "dblink"),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
     )
 }
 
+# Read replicas for safe requests, as comma-separated database URLs; see
+# core/db_router.py. To try it locally with SQLite, copy the database file
+# and list the copy: DATABASE_REPLICA_URLS=sqlite:////path/to/copy.sqlite3
+DATABASE_REPLICAS = []
+for _url in filter(None, (u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(","))):
+    _alias = f"replica{len(DATABASE_REPLICAS) + 1}"
+    DATABASES[_alias] = dj_database_url.parse(
+        _url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+    )
+    # Tests run against the primary only.
+    DATABASES[_alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+# Seconds a client keeps reading from the primary after it wrote.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+# Seconds an unreachable replica is skipped before it is tried again.
+REPLICA_RETRY_SECONDS = int(os.environ.get("REPLICA_RETRY_SECONDS", 30))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,3 +172,99 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# How core.media.serve_media delivers files:
+#   "django"           - stream from the worker (Range/ETag handled in Python)
+#   "x-accel-redirect" - nginx sends the file from the internal location
+#                        MEDIA_ACCEL_PREFIX, aliased to MEDIA_ROOT
+#   "x-sendfile"       - Apache/lighttpd send the file from its absolute path
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 7 * 24 * 60 * 60))
+
+# Cache shared by every worker on the host: SQL/profile sidecars and other
+# short-lived entries.
+#
+# The catalog version token (core/catalog.py) has a cache of its own, so
+# nothing else can evict it. Every process serving the API must see the
+# same token, so outside a single host it needs a shared backend (Redis,
+# memcached or the database cache). The default file cache is right for
+# one host: `manage.py check --deploy` and gunicorn's startup warn about
+# it unless CATALOG_CACHE_SINGLE_HOST is set, and refuse to start on a
+# per-process one.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", os.path.join(BASE_DIR, ".cache")
+        ),
+    },
+    "catalog": {
+        "BACKEND": os.environ.get(
+            "CATALOG_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get(
+            "CATALOG_CACHE_LOCATION", os.path.join(BASE_DIR, ".cache", "catalog")
+        ),
+    },
+}
+CATALOG_CACHE_SINGLE_HOST = os.environ.get("CATALOG_CACHE_SINGLE_HOST", "").lower() in ("1", "true", "yes")
+
+# Seconds clients may reuse catalog responses before revalidating with
+# If-None-Match. 0 means revalidate every time (a 304 costs only headers).
+CATALOG_CACHE_MAX_AGE = int(os.environ.get("CATALOG_CACHE_MAX_AGE", 0))
+
+# Bytes of rendered catalog responses (per path, read query parameters,
+# Accept header and catalog version) kept in each process with their
+# gzip/brotli/zstd variants, least recently used evicted first.
+# 0 turns pre-compression off.
+PRECOMPRESS_MAX_BYTES = int(os.environ.get("PRECOMPRESS_MAX_BYTES", 32 * 1024 * 1024))
+
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.fastpath.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", 100)),
+}
+
+# List endpoints build rows with values_list() instead of the serializers,
+# and JSON is written with orjson (see core/fastpath.py).
+API_FAST_PATH = os.environ.get("API_FAST_PATH", "1").lower() in ("1", "true", "yes")
+
+# Name of the database `manage.py bench` may fill with synthetic data
+# (besides test databases); anywhere else it needs --force.
+BENCH_DATABASE = os.environ.get("BENCH_DATABASE") or None
+
+# Directory shared by all gunicorn workers for metrics files, so
+# /api/metrics reports every worker. gunicorn.conf.py defaults it to
+# <tmp>/cropdoc-metrics and empties it on start (see
+# core.metrics.clear_metrics_dir()). Unset keeps metrics per process.
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+# Bearer token a scraper must send ("Authorization: Bearer <token>") to read
+# /api/metrics. Unset, the endpoint answers 404.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+# Server-Timing breakdown (db, serialize, render, total) on every response.
+# Single requests can opt in with an "X-Server-Timing: <token>" header
+# instead, which also stores a SQL/profile sidecar under
+# /api/debug/requests/<X-Debug-Id>/. Without a token the header is ignored.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+SERVER_TIMING_TOKEN = os.environ.get("SERVER_TIMING_TOKEN") or None
+SERVER_TIMING_SIDECAR_TTL = int(os.environ.get("SERVER_TIMING_SIDECAR_TTL", 300))
+SERVER_TIMING_PROFILE_INTERVAL = float(os.environ.get("SERVER_TIMING_PROFILE_INTERVAL", 0.005))
+
+# Write-behind buffer for /api/diagnosis-events/ (core/events.py): queued
+# events are written with one INSERT per EVENTS_BATCH_SIZE rows, at the
+# latest EVENTS_FLUSH_MS after the oldest arrived. Beyond
+# EVENTS_MAX_PENDING queued events the endpoint answers 503.
+EVENTS_BATCH_SIZE = int(os.environ.get("EVENTS_BATCH_SIZE", 500))
+EVENTS_FLUSH_MS = int(os.environ.get("EVENTS_FLUSH_MS", 1000))
+EVENTS_MAX_PENDING = int(os.environ.get("EVENTS_MAX_PENDING", 50_000))
+
+# Serve the read endpoints from core/async_views.py. cropdoc/asgi.py turns
+# this on; under WSGI the sync DRF views are the better fit.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "").lower() in ("1", "true", "yes")
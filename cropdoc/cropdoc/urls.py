@@ -16,10 +16,9 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from core.media import media_urlpatterns
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('core.urls')),  # Include the core app's URLs
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]+ media_urlpatterns()
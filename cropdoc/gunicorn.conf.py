@@ -0,0 +1,74 @@
+# gunicorn.conf.py
+#
+# Picked up by gunicorn from the working directory (or --config).
+#
+# With preload_app the master imports Django, then runs core.warmup:
+# routes, serializers, the catalog snapshot and the offline bundle are
+# built once and forked workers share them copy-on-write. Each worker
+# then opens and checks its database connections before serving, so its
+# first request runs at steady-state latency.
+
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cropdoc.settings')
+# Without a shared directory each worker reports only its own metrics, so
+# a scrape sees whichever worker answered it. on_starting empties it.
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'cropdoc-metrics'))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+# Recycling workers bounds slow leaks; the jitter staggers the restarts.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    # Workers that do not share the catalog version serve stale catalogs.
+    from core.checks import check_catalog_cache
+
+    messages = check_catalog_cache()
+    for message in messages:
+        log = server.log.error if message.is_serious() else server.log.warning
+        log('%s HINT: %s', message.msg, message.hint)
+    if any(message.is_serious() for message in messages):
+        sys.exit(1)
+
+    # Counters of the previous run's workers would be added to the new ones.
+    from core.metrics import clear_metrics_dir
+
+    clear_metrics_dir()
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from core.warmup import warm_up
+
+    server.log.info('Warm-up in master (ms): %s', warm_up())
+    # Keep the collector from touching (and so copying) the warmed-up
+    # objects in every worker.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from core.warmup import check_connections, warm_up
+
+    if not worker.cfg.preload_app:
+        worker.log.info('Warm-up in worker (ms): %s', warm_up())
+    # Sync workers serve from this thread, so the checked connection is
+    # the one the first request uses (CONN_MAX_AGE keeps it open).
+    for alias, error in check_connections().items():
+        if error:
+            worker.log.warning('Database %s unavailable at startup: %s', alias, error)
+
+
+def worker_exit(server, worker):
+    # Write diagnosis events still queued in this worker's buffer.
+    from core.events import flush_events
+
+    flush_events()